@@ -0,0 +1,106 @@
+"""基准测试公共工具（合成数据、计时、仓库配置加载）"""
+import sys
+import time
+import random
+import configparser
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.models import Channel  # noqa: E402
+
+CONFIG_PATH = ROOT / 'config' / 'config.ini'
+TEMPLATE_PATH = ROOT / 'config' / 'templates.txt'
+BLACKLIST_PATH = ROOT / 'config' / 'blacklist.txt'
+
+_GROUPS = ['央视频道', '卫视频道', '地方频道', '港澳台', '电影频道', '体育频道']
+
+
+def load_config() -> configparser.ConfigParser:
+    config = configparser.ConfigParser()
+    config.read(CONFIG_PATH, encoding='utf-8')
+    return config
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """执行一次并返回 (耗时秒, 返回值)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def template_names() -> List[str]:
+    """模板中的频道名及别名（跳过正则写法的别名）"""
+    names = []
+    with open(TEMPLATE_PATH, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '#genre#' in line:
+                continue
+            names.extend(
+                alias.strip() for alias in line.split('|')
+                if alias.strip() and not any(c in alias for c in '.*^$[](){}\\?')
+            )
+    return names
+
+
+def channel_names(count: int, seed: int = 1) -> List[str]:
+    """合成频道名：模板名加常见后缀，约20%为模板外的随机名称"""
+    rng = random.Random(seed)
+    known = template_names()
+    suffixes = ['', ' HD', '高清', '-1080P', ' 4K', '(备)', '[超清]']
+    names = []
+    for i in range(count):
+        if known and rng.random() < 0.8:
+            names.append(rng.choice(known) + rng.choice(suffixes))
+        else:
+            names.append(f"频道{rng.randint(1, 50000)}{rng.choice(suffixes)}")
+    return names
+
+
+def channel_url(rng: random.Random, i: int) -> str:
+    host = f"{rng.randint(1, 250)}.{rng.randint(1, 250)}.{rng.randint(0, 250)}.{rng.randint(1, 250)}"
+    query = '?key=abc&authid=x' if rng.random() < 0.3 else ''
+    return f"http://{host}:{rng.choice([80, 8080, 4022])}/live/{i}.m3u8{query}"
+
+
+def channels(count: int, seed: int = 1) -> List[Channel]:
+    rng = random.Random(seed)
+    return [
+        Channel(name, channel_url(rng, i), original_category=rng.choice(_GROUPS))
+        for i, name in enumerate(channel_names(count, seed))
+    ]
+
+
+def m3u_playlist(count: int, seed: int = 1) -> str:
+    """合成M3U播放列表"""
+    rng = random.Random(seed)
+    lines = ['#EXTM3U x-tvg-url="http://epg.example/e.xml"']
+    for i, name in enumerate(channel_names(count, seed)):
+        group = rng.choice(_GROUPS)
+        if rng.random() < 0.8:
+            attrs = f'tvg-id="{name}" tvg-name="{name}" tvg-logo="http://logo.example/{i}.png" group-title="{group}"'
+        else:
+            attrs = f'group-title="{group}"'
+        lines.append(f'#EXTINF:-1 {attrs},{name}')
+        lines.append(channel_url(rng, i))
+    return '\n'.join(lines) + '\n'
+
+
+def txt_playlist(count: int, seed: int = 2) -> str:
+    """合成TXT播放列表（分类,#genre# 分组）"""
+    rng = random.Random(seed)
+    lines = []
+    for i, name in enumerate(channel_names(count, seed)):
+        if i % 200 == 0:
+            lines.append(f"{rng.choice(_GROUPS)},#genre#")
+        lines.append(f"{name},{channel_url(rng, i)}")
+    return '\n'.join(lines) + '\n'
+
+
+def print_row(label: str, seconds: float, count: int, unit: str = '条') -> None:
+    rate = count / seconds if seconds > 0 else float('inf')
+    print(f"  {label:<28} {seconds:8.3f}s  {count:>8}{unit}  {rate:>12,.0f}{unit}/s")
@@ -0,0 +1,68 @@
+"""黑名单过滤基准：原逐条子串扫描 vs BlacklistMatcher
+
+用法（仓库根目录）:
+    python benchmarks/bench_blacklist.py [--channels 100000] [--old-sample 1000]
+
+原实现对每个频道遍历全部黑名单条目（any(entry in name or entry in url)），
+耗时与 频道数×条目数 成正比，只在 --old-sample 个频道上实测后按比例外推。
+同一样本上两种实现的过滤结果必须一致。
+"""
+import argparse
+import random
+
+from _common import BLACKLIST_PATH, Channel, channels, print_row, timed
+
+from core.blacklist import BlacklistMatcher
+
+
+def load_entries():
+    with open(BLACKLIST_PATH, encoding='utf-8') as f:
+        return {line.strip().lower() for line in f if line.strip() and not line.startswith('#')}
+
+
+def old_is_blacklisted(channel: Channel, entries) -> bool:
+    """原 main.is_blacklisted"""
+    channel_name = channel.name.lower()
+    channel_url = channel.url.lower()
+    return any(entry in channel_name or entry in channel_url for entry in entries)
+
+
+def with_hits(items, entries, ratio: float = 0.05, seed: int = 3):
+    """将一部分频道URL替换为黑名单URL条目加后缀，保证有命中"""
+    rng = random.Random(seed)
+    urls = sorted(e for e in entries if '://' in e)
+    for channel in items:
+        if urls and rng.random() < ratio:
+            channel.url = rng.choice(urls) + rng.choice(['', 'cctv1', '&token=1', '/index.m3u8'])
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=100000)
+    parser.add_argument('--old-sample', type=int, default=1000)
+    args = parser.parse_args()
+
+    entries = load_entries()
+    items = with_hits(channels(args.channels), entries)
+    sample = items[:args.old_sample]
+    print(f"黑名单条目: {len(entries)} | 频道: {len(items)}")
+
+    build_time, matcher = timed(BlacklistMatcher, entries)
+    print_row('BlacklistMatcher 编译', build_time, len(entries))
+    new_time, (kept, removed) = timed(matcher.filter, items)
+    print_row('BlacklistMatcher 过滤', new_time, len(items))
+
+    old_time, old_kept = timed(lambda: [c for c in sample if not old_is_blacklisted(c, entries)])
+    print_row('原子串扫描（样本）', old_time, len(sample))
+    print(f"  原实现外推 {len(items)} 条: {old_time / len(sample) * len(items):.1f}s")
+
+    new_sample = [c for c in sample if not matcher.is_blacklisted(c)]
+    agree = [c.url for c in old_kept] == [c.url for c in new_sample]
+    print(f"样本结果一致: {agree} | 过滤: {len(removed)}/{len(items)}")
+    if not agree:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""分类匹配基准：原逐条正则扫描 vs CategoryEngine
+
+用法（仓库根目录）:
+    python benchmarks/bench_matcher.py [--names 50000]
+
+两种实现对同一批已标准化的唯一名称做模板匹配（不经过结果缓存），比较 名称/秒，
+并校验每个名称的分类结果一致（按模板顺序取第一个有规则命中的分类）。
+"""
+import argparse
+import re
+
+from _common import TEMPLATE_PATH, channel_names, load_config, print_row, timed
+
+from core.matcher import AutoCategoryMatcher, CategoryEngine
+
+
+def old_match(compiled, name: str) -> str:
+    """原 AutoCategoryMatcher.match 的模板匹配部分：逐分类、逐条 re.search"""
+    for category, patterns in compiled:
+        for pattern in patterns:
+            if pattern.search(name):
+                return category
+    return "未分类"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=50000)
+    args = parser.parse_args()
+
+    config = load_config()
+    config.set('MATCHER', 'enable_result_cache', 'false')
+    matcher = AutoCategoryMatcher(str(TEMPLATE_PATH), config)
+
+    names = list(dict.fromkeys(
+        matcher.normalize_channel_name(matcher._clean_channel_name(n)) for n in channel_names(args.names)
+    ))
+    rules = list(matcher.categories.items())
+    print(f"模板规则: {sum(len(r) for _, r in rules)} | 唯一名称: {len(names)}")
+
+    old_build, compiled = timed(lambda: [(c, [re.compile(s) for s in sources]) for c, sources in rules])
+    new_build, engine = timed(CategoryEngine, rules)
+    print_row('原实现 编译', old_build, len(rules), '类')
+    print_row('CategoryEngine 编译', new_build, len(rules), '类')
+
+    old_time, old_result = timed(lambda: [old_match(compiled, n) for n in names])
+    new_time, new_result = timed(lambda: [engine.match(n) or "未分类" for n in names])
+    print_row('原逐条正则扫描', old_time, len(names), '名')
+    print_row('CategoryEngine', new_time, len(names), '名')
+    print(f"  加速: {old_time / new_time:.1f}x")
+
+    diffs = [(n, a, b) for n, a, b in zip(names, old_result, new_result) if a != b]
+    print(f"结果一致: {not diffs}" + (f" | 不一致示例: {diffs[:3]}" if diffs else ""))
+    if diffs:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""播放列表解析基准：原分批正则解析 vs 单遍状态机
+
+用法（仓库根目录）:
+    python benchmarks/bench_parser.py [--channels 100000]
+
+分别生成M3U和TXT格式的合成播放列表（数MB），比较 parse_legacy 与 parse_fast 的吞吐。
+原实现在批次边界上会丢失EXTINF与URL被分到两个批次的频道，
+校验时允许 parse_legacy 少于 parse_fast，但 parse_legacy 得到的频道必须全部出现在 parse_fast 的结果中。
+"""
+import argparse
+from collections import Counter
+
+from _common import m3u_playlist, print_row, timed, txt_playlist
+
+from core.parser import PlaylistParser
+
+
+def rows(channels):
+    return Counter((c.name, c.url, c.original_category) for c in channels)
+
+
+def compare(label: str, parser: PlaylistParser, content: str) -> bool:
+    size = len(content.encode('utf-8')) / 1024 / 1024
+    old_time, old = timed(lambda: list(parser.parse_legacy(content)))
+    new_time, new = timed(lambda: list(parser.parse_fast(content)))
+    print(f"{label} | {size:.1f}MB")
+    print_row('parse_legacy', old_time, len(old))
+    print_row('parse_fast', new_time, len(new))
+    print(f"  加速: {old_time / new_time:.1f}x")
+
+    old_rows, new_rows = rows(old), rows(new)
+    extra = old_rows - new_rows
+    lost = new_rows - old_rows
+    print(f"  parse_legacy 批次边界丢失: {sum(lost.values())} | 仅 parse_legacy 得到: {sum(extra.values())}")
+    if extra:
+        print(f"  不一致示例: {list(extra)[:3]}")
+    return not extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=100000)
+    args = parser.parse_args()
+
+    playlist_parser = PlaylistParser()
+    ok = compare('M3U', playlist_parser, m3u_playlist(args.channels))
+    ok = compare('TXT', playlist_parser, txt_playlist(args.channels)) and ok
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
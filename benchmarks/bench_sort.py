@@ -0,0 +1,77 @@
+"""模板排序基准：原逐分类全表扫描 vs 单遍分桶排序
+
+用法（仓库根目录）:
+    python benchmarks/bench_sort.py [--channels 200000] [--old-sample 20000]
+
+原实现对每个分类扫描一次全部频道，并对白名单列表做线性成员判断，
+在 --old-sample 个频道上实测并校验两种实现的输出顺序一致。
+"""
+import argparse
+
+from _common import TEMPLATE_PATH, channels, load_config, print_row, timed
+
+from core.matcher import AutoCategoryMatcher
+
+
+def old_sort(matcher: AutoCategoryMatcher, items, whitelist):
+    """原 AutoCategoryMatcher.sort_channels_by_template"""
+    order_cache = {}
+
+    def channel_order(channel, channel_names):
+        key = tuple(channel_names)
+        if key not in order_cache:
+            order_cache[key] = {name: i for i, name in enumerate(channel_names)}
+        clean_name = matcher.normalize_channel_name(channel.name)
+        return order_cache[key].get(clean_name, len(channel_names))
+
+    whitelist_channels = [c for c in items if c.name.lower() in whitelist]
+    sorted_channels = []
+    for category in matcher.template_order:
+        category_channels = [
+            c for c in items
+            if c not in whitelist_channels and c.category == category
+        ]
+        sorted_channels.extend(sorted(
+            category_channels,
+            key=lambda c: channel_order(c, matcher.template_order[category])
+        ))
+    uncategorized = [
+        c for c in items
+        if c not in whitelist_channels and c.category not in matcher.template_order
+    ]
+    sorted_channels.extend(uncategorized)
+    return whitelist_channels + sorted_channels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=200000)
+    parser.add_argument('--old-sample', type=int, default=20000)
+    args = parser.parse_args()
+
+    config = load_config()
+    config.set('MATCHER', 'enable_result_cache', 'false')
+    matcher = AutoCategoryMatcher(str(TEMPLATE_PATH), config)
+    items = channels(args.channels)
+    for channel in items:
+        channel.category = matcher.match(channel.name)
+    whitelist = {'cctv1', 'cctv5+', '湖南卫视'}
+    sample = items[:args.old_sample]
+    print(f"频道: {len(items)} | 分类: {len(matcher.template_order)} | 白名单: {len(whitelist)}")
+
+    new_time, _ = timed(matcher.sort_channels_by_template, items, whitelist)
+    print_row('单遍分桶排序', new_time, len(items))
+
+    new_sample_time, new_sample = timed(matcher.sort_channels_by_template, sample, whitelist)
+    old_time, old_sample = timed(old_sort, matcher, sample, whitelist)
+    print_row('单遍分桶排序（样本）', new_sample_time, len(sample))
+    print_row('原逐分类扫描（样本）', old_time, len(sample))
+
+    agree = [c.url for c in old_sample] == [c.url for c in new_sample]
+    print(f"样本顺序一致: {agree}")
+    if not agree:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
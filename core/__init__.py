@@ -5,6 +5,13 @@ from .parser import PlaylistParser
 from .matcher import AutoCategoryMatcher
 from .tester import SpeedTester
 from .exporter import ResultExporter
+from .blacklist import BlacklistMatcher
+from .local_source import LocalSource
+from .canonical import UrlCanonicalizer, ChannelDeduplicator
+from .history import HistoryIndex
+from .history_store import HistoryStore
+from .pruner import SourcePruner
+from .result_store import ProbeResultStore
 from .progress import SmartProgress
 
 # 显式声明导出的公共API
@@ -15,6 +22,14 @@ __all__ = [
     'AutoCategoryMatcher',
     'SpeedTester',
     'ResultExporter',
+    'BlacklistMatcher',
+    'LocalSource',
+    'UrlCanonicalizer',
+    'ChannelDeduplicator',
+    'HistoryIndex',
+    'HistoryStore',
+    'SourcePruner',
+    'ProbeResultStore',
     'SmartProgress'
 ]
 
@@ -0,0 +1,154 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 状态转移键: (状态 << 21) | 字符码位，Unicode码位最大为0x10FFFF(21位)
+_CHAR_BITS = 21
+
+
+class AhoCorasick:
+    """Aho-Corasick多模式匹配自动机（扁平转移表，内存优化版）
+
+    所有模式一次性编译成自动机，之后对任意文本只需线性扫描一遍
+    即可找出其中出现的全部模式。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        构建自动机
+
+        参数:
+            patterns: 模式字符串（空串会被忽略，重复模式只保留第一次出现）
+        """
+        self.patterns: List[str] = []
+        self._goto: Dict[int, int] = {}
+        self._fail = array('i', [0])
+        # 状态 -> 该状态(含失败链)上最先命中的模式编号
+        self._output: Dict[int, int] = {}
+        # 状态 -> 失败链上下一个带输出的状态（用于枚举全部命中）
+        self._dict_link: Dict[int, int] = {}
+
+        self._build(patterns)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _build(self, patterns: Iterable[str]) -> None:
+        """插入全部模式并按BFS顺序计算失败链接"""
+        goto = self._goto
+        parent = array('i', [0])
+        chars = array('i', [0])
+        depth = array('i', [0])
+        terminal: Dict[int, int] = {}
+        seen = set()
+
+        for pattern in patterns:
+            if not pattern or pattern in seen:
+                continue
+            seen.add(pattern)
+            state = 0
+            for ch in pattern:
+                key = (state << _CHAR_BITS) | ord(ch)
+                nxt = goto.get(key)
+                if nxt is None:
+                    nxt = len(parent)
+                    goto[key] = nxt
+                    parent.append(state)
+                    chars.append(ord(ch))
+                    depth.append(depth[state] + 1)
+                state = nxt
+            terminal[state] = len(self.patterns)
+            self.patterns.append(pattern)
+
+        node_count = len(parent)
+        fail = array('i', bytes(4 * node_count))
+
+        # 按深度分桶即可得到BFS顺序（父节点总先于子节点处理）
+        levels: List[List[int]] = []
+        for node in range(1, node_count):
+            d = depth[node]
+            while len(levels) < d:
+                levels.append([])
+            levels[d - 1].append(node)
+
+        output = self._output
+        dict_link = self._dict_link
+        for level in levels:
+            for node in level:
+                p = parent[node]
+                if p:
+                    c = chars[node]
+                    f = fail[p]
+                    while True:
+                        nxt = goto.get((f << _CHAR_BITS) | c)
+                        if nxt is not None:
+                            fail[node] = nxt
+                            break
+                        if not f:
+                            break
+                        f = fail[f]
+
+                f = fail[node]
+                link = f if f in terminal else dict_link.get(f)
+                if link is not None:
+                    dict_link[node] = link
+                if node in terminal:
+                    output[node] = terminal[node]
+                elif link is not None:
+                    output[node] = terminal[link]
+
+        self._fail = fail
+        self._terminal = terminal
+
+    def _step(self, state: int, code: int) -> int:
+        """单字符状态转移"""
+        goto = self._goto
+        fail = self._fail
+        while True:
+            nxt = goto.get((state << _CHAR_BITS) | code)
+            if nxt is not None:
+                return nxt
+            if not state:
+                return 0
+            state = fail[state]
+
+    def search(self, text: str) -> Optional[str]:
+        """返回文本中最先出现（按结束位置）的模式，无命中返回None"""
+        if not self.patterns:
+            return None
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for ch in text:
+            code = ord(ch)
+            while True:
+                nxt = goto.get((state << _CHAR_BITS) | code)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if state in output:
+                return self.patterns[output[state]]
+        return None
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        枚举文本中的全部命中
+        返回: (结束位置, 模式编号) 迭代器
+        """
+        if not self.patterns:
+            return
+        terminal = self._terminal
+        dict_link = self._dict_link
+        state = 0
+        for pos, ch in enumerate(text):
+            state = self._step(state, ord(ch))
+            node = state if state in terminal else dict_link.get(state)
+            while node is not None:
+                yield pos, terminal[node]
+                node = dict_link.get(node)
+
+    def __contains__(self, text: str) -> bool:
+        return self.search(text) is not None
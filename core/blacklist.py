@@ -0,0 +1,276 @@
+import os
+import re
+import bisect
+import logging
+import ipaddress
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .automaton import AhoCorasick
+from .models import Channel
+
+logger = logging.getLogger(__name__)
+
+# 频道名与URL之间的分隔符（不会出现在黑名单条目中，避免跨字段误命中）
+_FIELD_SEPARATOR = '\x00'
+
+# 裸域名条目（不含协议/路径/端口）
+_HOST_REGEX = re.compile(r'^(?=.*[a-z])[a-z0-9-]+(?:\.[a-z0-9-]+)+\.?$')
+
+
+class _RangeIndex:
+    """IP段索引（合并后的有序区间 + 二分查找）"""
+
+    def __init__(self):
+        self._pending: List[Tuple[int, int, str]] = []
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._entries: List[List[Tuple[int, int, str]]] = []
+
+    def add(self, network, entry: str) -> None:
+        self._pending.append((int(network.network_address), int(network.broadcast_address), entry))
+
+    def build(self) -> None:
+        """合并重叠区间，每个合并区间保留原始条目用于审计"""
+        for start, end, entry in sorted(self._pending):
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+                self._entries[-1].append((start, end, entry))
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+                self._entries.append([(start, end, entry)])
+        self._pending = []
+
+    def lookup(self, value: int) -> Optional[str]:
+        idx = bisect.bisect_right(self._starts, value) - 1
+        if idx < 0 or value > self._ends[idx]:
+            return None
+        for start, end, entry in self._entries[idx]:
+            if start <= value <= end:
+                return entry
+        return None
+
+    def __len__(self) -> int:
+        return sum(len(e) for e in self._entries)
+
+
+class BlacklistMatcher:
+    """黑名单匹配引擎（按条目类型分索引，仅剩余子串走Aho-Corasick自动机）
+
+    条目类型:
+        带路径/参数的URL  -> URL前缀索引（按 协议://主机:端口 分组的有序列表，二分查找以条目开头的URL）
+        域名/协议+域名    -> 域名后缀索引（同时屏蔽其全部子域名）
+        IP/CIDR网段      -> IPv4/IPv6有序区间，二分查找
+        其它             -> 子串匹配（频道名称和URL）
+    """
+
+    def __init__(self, entries: Iterable[str]):
+        """
+        编译黑名单
+
+        参数:
+            entries: 黑名单条目（已转小写，与load_list_file输出一致）
+        """
+        self.url_prefixes: Dict[str, List[str]] = {}
+        self.hosts: Dict[str, str] = {}
+        self.ranges = {4: _RangeIndex(), 6: _RangeIndex()}
+        substrings = []
+
+        cleaned = sorted({
+            e.strip().lower() for e in entries
+            if e.strip() and not e.startswith('#')
+        })
+        for entry in cleaned:
+            if not self._index_entry(entry):
+                substrings.append(entry)
+
+        for index in self.ranges.values():
+            index.build()
+        for prefixes in self.url_prefixes.values():
+            prefixes.sort()
+        self.automaton = AhoCorasick(substrings)
+        self.hits: Counter = Counter()
+        self._size = len(cleaned)
+
+        logger.debug(
+            f"黑名单索引完成 | URL前缀: {sum(map(len, self.url_prefixes.values()))} | 域名: {len(self.hosts)} | "
+            f"IPv4段: {len(self.ranges[4])} | IPv6段: {len(self.ranges[6])} | 子串: {len(self.automaton)}"
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def _index_entry(self, entry: str) -> bool:
+        """将条目归入对应索引，无法归类（需子串匹配）时返回False"""
+        network = self._parse_network(entry)
+        if network is not None:
+            self.ranges[network.version].add(network, entry)
+            return True
+
+        if _HOST_REGEX.match(entry):
+            self.hosts[entry.rstrip('.')] = entry
+            return True
+
+        if '://' not in entry:
+            return False
+
+        try:
+            parts = urlsplit(entry)
+            host = parts.hostname
+            port = parts.port
+        except ValueError:
+            return False
+        if not host:
+            return False
+
+        # 仅有协议和主机（无端口/路径/参数）视为整站屏蔽
+        if port is None and parts.path in ('', '/') and not parts.query and not parts.fragment:
+            network = self._parse_network(host)
+            if network is not None:
+                self.ranges[network.version].add(network, entry)
+            else:
+                self.hosts[host.rstrip('.')] = entry
+            return True
+
+        if parts.path in ('', '/') and not parts.query:
+            # 带端口的站点前缀，精确集合无法覆盖，交给子串匹配
+            return False
+
+        # 带路径/参数的URL按前缀匹配（条目常以 = & / 结尾，频道URL可能追加参数）
+        prefixes = self.url_prefixes.setdefault(self._authority(entry), [])
+        prefixes.append(entry)
+        return True
+
+    @staticmethod
+    def _parse_network(value: str):
+        """解析IP或CIDR网段，非IP返回None"""
+        if not value or not (value[0].isdigit() or ':' in value):
+            return None
+        try:
+            return ipaddress.ip_network(value.strip('[]'), strict=False)
+        except ValueError:
+            return None
+
+    def _match_host(self, host: str) -> Optional[str]:
+        """域名后缀/IP段查找"""
+        if host[0].isdigit() or ':' in host:
+            try:
+                ip = ipaddress.ip_address(host)
+            except ValueError:
+                ip = None
+            if ip is not None:
+                return self.ranges[ip.version].lookup(int(ip))
+
+        if not self.hosts:
+            return None
+        host = host.rstrip('.')
+        while True:
+            entry = self.hosts.get(host)
+            if entry is not None:
+                return entry
+            _, dot, host = host.partition('.')
+            if not dot:
+                return None
+
+    def _match_url(self, url: str) -> Optional[str]:
+        """URL前缀/域名/IP段匹配"""
+        if self.url_prefixes:
+            prefixes = self.url_prefixes.get(self._authority(url))
+            if prefixes:
+                entry = self._match_prefix(prefixes, url)
+                if entry is not None:
+                    return entry
+
+        host = self._extract_host(url)
+        if host:
+            return self._match_host(host)
+        return None
+
+    @staticmethod
+    def _match_prefix(prefixes: List[str], url: str) -> Optional[str]:
+        """
+        在有序前缀列表中查找URL的最短前缀条目（与按序逐条 startswith 的结果一致）
+
+        url的任一前缀p若排在候选条目之前，则候选条目也以p开头，
+        因此每次只需在候选条目与url的公共前缀范围内继续二分查找。
+        """
+        match = None
+        target = url
+        hi = bisect.bisect_right(prefixes, target)
+        while hi:
+            candidate = prefixes[hi - 1]
+            if url.startswith(candidate):
+                match = candidate
+                target = candidate[:-1]
+            else:
+                target = os.path.commonprefix((target, candidate))
+            if not target:
+                break
+            hi = bisect.bisect_right(prefixes, target, 0, hi - 1)
+        return match
+
+    @staticmethod
+    def _authority(url: str) -> str:
+        """URL的 协议://用户信息@主机:端口 部分（前缀索引分组键）"""
+        scheme_end = url.find('://')
+        if scheme_end < 0:
+            return ''
+        start = scheme_end + 3
+        end = len(url)
+        for sep in '/?#':
+            pos = url.find(sep, start)
+            if 0 <= pos < end:
+                end = pos
+        return url[:end]
+
+    @staticmethod
+    def _extract_host(url: str) -> str:
+        """快速提取URL主机名（不经过urlsplit，URL已转小写）"""
+        scheme_end = url.find('://')
+        if scheme_end < 0:
+            return ''
+        start = scheme_end + 3
+        end = len(url)
+        for sep in '/?#':
+            pos = url.find(sep, start)
+            if 0 <= pos < end:
+                end = pos
+        netloc = url[start:end].rpartition('@')[2]
+        if netloc.startswith('['):
+            return netloc[1:netloc.find(']')] if ']' in netloc else ''
+        return netloc.partition(':')[0]
+
+    def match(self, channel: Channel) -> Optional[str]:
+        """
+        检查频道名称和URL
+        返回: 命中的黑名单条目，未命中返回None
+        """
+        url = channel.url.lower()
+        entry = self._match_url(url)
+        if entry is None and self.automaton:
+            entry = self.automaton.search(f"{channel.name.lower()}{_FIELD_SEPARATOR}{url}")
+        return entry
+
+    def is_blacklisted(self, channel: Channel) -> bool:
+        """检查频道是否在黑名单中"""
+        return self.match(channel) is not None
+
+    def filter(self, channels: Iterable[Channel]) -> Tuple[List[Channel], List[Tuple[Channel, str]]]:
+        """
+        批量过滤（同时记录命中条目便于审计）
+        返回: (保留的频道, [(被过滤频道, 命中条目)])
+        """
+        kept = []
+        removed = []
+        for channel in channels:
+            entry = self.match(channel)
+            if entry is None:
+                kept.append(channel)
+            else:
+                removed.append((channel, entry))
+                self.hits[entry] += 1
+        return kept, removed
@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """线程安全的有界LRU缓存（带命中/未命中/淘汰计数）"""
+
+    def __init__(self, max_size: int, name: str = "cache"):
+        """
+        参数:
+            max_size: 最大条目数（<=0 表示不限制）
+            name: 缓存名称（用于统计输出）
+        """
+        self.name = name
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取并刷新最近使用位置，计入命中统计"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入（超出容量时淘汰最久未使用的条目）"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def setdefault(self, key: Hashable, value: Any) -> Any:
+        """不存在时写入，返回当前值（不计入命中统计）"""
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+            self._data[key] = value
+            self._evict()
+            return value
+
+    def _evict(self) -> None:
+        if self.max_size <= 0:
+            return
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.put(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """按最久未使用到最近使用的顺序返回快照"""
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self) -> None:
+        """清空条目（保留统计计数）"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_MISSING = object()
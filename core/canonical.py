@@ -0,0 +1,234 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from .models import Channel
+
+logger = logging.getLogger(__name__)
+
+# 协议默认端口（规范化时去除）
+_DEFAULT_PORTS = {'http': ':80', 'https': ':443', 'rtmp': ':1935', 'rtsp': ':554'}
+
+# 代表URL选择策略
+REPRESENTATIVE_STRATEGIES = ('first', 'last', 'https', 'shortest')
+
+
+class UrlCanonicalizer:
+    """URL规范化（生成去重键，只影响去重判断，不修改频道实际使用的URL）
+
+    规则:
+        host_case      协议和主机名转小写
+        default_port   去除协议默认端口（http:80 / https:443 等）
+        trailing_slash 去除路径末尾的斜杠
+        fragment       去除#锚点
+        ignored_params 去除跟踪/鉴权等不影响内容的查询参数（支持前缀通配 utm_*）
+        query_order    查询参数按名称排序
+    """
+
+    RULES = ('host_case', 'default_port', 'trailing_slash', 'fragment', 'ignored_params', 'query_order')
+
+    def __init__(self, ignore_params: Iterable[str] = ()):
+        self.ignore_exact = set()
+        self.ignore_prefixes: Tuple[str, ...] = ()
+        prefixes = []
+        for param in ignore_params:
+            param = param.strip()
+            if not param:
+                continue
+            if param.endswith('*'):
+                prefixes.append(param[:-1])
+            else:
+                self.ignore_exact.add(param)
+        self.ignore_prefixes = tuple(sorted(prefixes))
+
+    @classmethod
+    def from_config(cls, config) -> Optional["UrlCanonicalizer"]:
+        """按配置创建，未启用规范化去重时返回None"""
+        if not config or not config.getboolean('DEDUPE', 'enable_canonical_dedupe', fallback=False):
+            return None
+        params = config.get('DEDUPE', 'ignore_params', fallback='utm_*')
+        return cls(params.split(','))
+
+    @property
+    def signature(self) -> str:
+        """规则配置签名（参与解析缓存键计算）"""
+        return f"canon1|{','.join(sorted(self.ignore_exact))}|{','.join(self.ignore_prefixes)}"
+
+    def _is_ignored(self, name: str) -> bool:
+        return name in self.ignore_exact or (bool(self.ignore_prefixes) and name.startswith(self.ignore_prefixes))
+
+    def key(self, url: str) -> str:
+        """计算去重键"""
+        return self._canonicalize(url, None)
+
+    def explain(self, url: str) -> List[str]:
+        """返回对该URL实际生效的规则名称"""
+        fired: List[str] = []
+        self._canonicalize(url, fired)
+        return fired
+
+    def merging_rules(self, first: str, second: str) -> List[str]:
+        """
+        返回使两个URL得到相同去重键所依赖的规则（去掉该规则后两个键不再相同）
+        两个URL上都生效但对合并无影响的规则不计入；没有单独必需的规则时返回两者生效规则的并集
+        """
+        fired = set(self.explain(first)) | set(self.explain(second))
+        needed = [
+            rule for rule in self.RULES
+            if rule in fired and self._canonicalize(first, None, (rule,)) != self._canonicalize(second, None, (rule,))
+        ]
+        return needed or [rule for rule in self.RULES if rule in fired]
+
+    def _canonicalize(self, url: str, fired: Optional[List[str]], skip: Tuple[str, ...] = ()) -> str:
+        """skip: 不应用的规则（用于判断合并依赖的规则）"""
+        scheme_end = url.find('://')
+        if scheme_end <= 0:
+            return url
+
+        scheme = url[:scheme_end]
+        rest = url[scheme_end + 3:]
+
+        # 锚点
+        hash_pos = rest.find('#')
+        if hash_pos >= 0 and 'fragment' not in skip:
+            rest = rest[:hash_pos]
+            if fired is not None:
+                fired.append('fragment')
+
+        # 主机部分（直到第一个 / 或 ?）
+        end = len(rest)
+        for sep in '/?':
+            pos = rest.find(sep)
+            if 0 <= pos < end:
+                end = pos
+        netloc = rest[:end]
+        path, has_query, query = rest[end:].partition('?')
+
+        lowered_scheme = scheme.lower()
+        userinfo, at, host = netloc.rpartition('@')
+        lowered_host = host.lower()
+        if 'host_case' not in skip:
+            if fired is not None and (lowered_scheme != scheme or lowered_host != host):
+                fired.append('host_case')
+            scheme = lowered_scheme
+            host = lowered_host
+
+        default_port = _DEFAULT_PORTS.get(scheme)
+        if default_port and host.endswith(default_port) and 'default_port' not in skip:
+            host = host[:-len(default_port)]
+            if fired is not None:
+                fired.append('default_port')
+
+        if len(path) > 1 and path.endswith('/') and 'trailing_slash' not in skip:
+            path = path.rstrip('/')
+            if fired is not None:
+                fired.append('trailing_slash')
+        elif path == '/':
+            path = ''
+
+        canonical = f"{scheme}://{userinfo}{at}{host}{path}"
+        if not has_query or not query:
+            return canonical
+
+        params = [p for p in query.split('&') if p]
+        kept = params
+        if 'ignored_params' not in skip:
+            kept = [p for p in params if not self._is_ignored(p.partition('=')[0])]
+        if fired is not None and len(kept) != len(params):
+            fired.append('ignored_params')
+        if not kept:
+            return canonical
+        ordered = kept if 'query_order' in skip else sorted(kept)
+        if fired is not None and ordered != kept:
+            fired.append('query_order')
+        return f"{canonical}?{'&'.join(ordered)}"
+
+
+class ChannelDeduplicator:
+    """按规范化URL键去重，每个键保留一个代表频道并统计各规则合并的重复数"""
+
+    def __init__(self, canonicalizer: Optional[UrlCanonicalizer] = None, strategy: str = 'last'):
+        """
+        参数:
+            canonicalizer: URL规范化器（None时仅合并完全相同的URL）
+            strategy: 代表URL选择策略
+                first    保留最先出现的频道
+                last     保留最后出现的频道（与原按URL字典去重行为一致）
+                https    优先https，其次最先出现
+                shortest 优先URL最短，其次最先出现
+        """
+        if strategy not in REPRESENTATIVE_STRATEGIES:
+            logger.warning(f"未知代表URL策略: {strategy}，使用last")
+            strategy = 'last'
+        self.canonicalizer = canonicalizer
+        self.strategy = strategy
+        self.collapsed: Counter = Counter()
+        self._seen: Dict[str, Channel] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "ChannelDeduplicator":
+        strategy = 'last'
+        if config:
+            strategy = config.get('DEDUPE', 'representative', fallback='last').strip().lower()
+        return cls(UrlCanonicalizer.from_config(config), strategy)
+
+    def key_of(self, channel: Channel) -> str:
+        """频道去重键（优先使用解析时已计算的键）"""
+        if channel.url_key is not None:
+            return channel.url_key
+        if self.canonicalizer is None:
+            return channel.url
+        channel.url_key = self.canonicalizer.key(channel.url)
+        return channel.url_key
+
+    def _prefer(self, current: Channel, candidate: Channel) -> bool:
+        """候选频道是否替换当前代表"""
+        if self.strategy == 'last':
+            return True
+        if self.strategy == 'https':
+            return candidate.url.startswith('https://') and not current.url.startswith('https://')
+        if self.strategy == 'shortest':
+            return len(candidate.url) < len(current.url)
+        return False
+
+    def _record(self, kept: Channel, duplicate: Channel) -> None:
+        """记录一次合并（URL完全相同计为exact，否则计入合并所依赖的规则）"""
+        if kept.url == duplicate.url or self.canonicalizer is None:
+            self.collapsed['exact'] += 1
+            return
+        rules = self.canonicalizer.merging_rules(kept.url, duplicate.url)
+        for rule in rules or ('exact',):
+            self.collapsed[rule] += 1
+
+    def dedupe(self, channels: Iterable[Channel]) -> List[Channel]:
+        """批量去重（保持每个键首次出现的位置）"""
+        unique: Dict[str, Channel] = {}
+        for channel in channels:
+            key = self.key_of(channel)
+            current = unique.get(key)
+            if current is None:
+                unique[key] = channel
+                continue
+            self._record(current, channel)
+            if self._prefer(current, channel):
+                unique[key] = channel
+        return list(unique.values())
+
+    def accept(self, channel: Channel) -> bool:
+        """
+        流式去重：键首次出现时返回True
+        已产出的频道无法再被替换，因此流式模式始终保留最先出现的频道
+        """
+        key = self.key_of(channel)
+        current = self._seen.get(key)
+        if current is None:
+            self._seen[key] = channel
+            return True
+        self._record(current, channel)
+        return False
+
+    def log_stats(self) -> None:
+        """输出各规则合并的重复数"""
+        if not self.collapsed:
+            return
+        details = ", ".join(f"{rule}({count})" for rule, count in self.collapsed.most_common())
+        logger.info(f"• URL去重规则统计: {details}")
@@ -3,12 +3,12 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Callable, Set, Dict, Tuple, Optional
 from .models import Channel
+from .history_store import HistoryStore
 import csv
 from urllib.parse import quote
 import re
 from collections import defaultdict
 import gzip
-import shutil
 
 logger = logging.getLogger(__name__)
 
@@ -183,7 +183,20 @@ class ResultExporter:
         )
 
     def _export_history(self, channels: List[Channel]) -> None:
-        """历史记录导出（含所有频道状态）"""
+        """
+        历史记录导出（含所有频道状态）
+        复用测速结果存储的频道本次未实际测速，不写入历史，避免被历史索引重复计为新的测速结果
+        """
+        reused = sum(1 for ch in channels if ch.reused)
+        if reused:
+            channels = [ch for ch in channels if not ch.reused]
+            logger.info(f"历史记录跳过复用结果: {reused}")
+
+        store = HistoryStore.from_config(self.config)
+        if store is not None:
+            self._export_history_store(store, channels)
+            return
+
         csv_output_path = Path(self.config.get(
             'PATHS', 
             'csv_output_path', 
@@ -191,9 +204,14 @@ class ResultExporter:
         ))
         csv_output_path.mkdir(parents=True, exist_ok=True)
         history_file = csv_output_path / f"history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        compress = self.config.getboolean('EXPORTER', 'compress_history', fallback=True)
+        if compress:
+            # 直接写入gzip流，不再先落盘未压缩文件再复制
+            history_file = history_file.with_name(f"{history_file.name}.gz")
         
         try:
-            with open(history_file, 'w', encoding='utf-8', newline='') as f:
+            opener = gzip.open if compress else open
+            with opener(history_file, 'wt', encoding='utf-8', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow([
                     'Name', 'URL', 'Category', 'OriginalCategory',
@@ -205,17 +223,30 @@ class ResultExporter:
                         ch.status, ch.download_speed, ch.response_time
                     ])
             
-            if self.config.getboolean('EXPORTER', 'compress_history', fallback=True):
-                with open(history_file, 'rb') as f_in:
-                    with gzip.open(f"{history_file}.gz", 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-                history_file.unlink()
-                logger.info(f"历史记录已压缩: {history_file}.gz | 总频道: {len(channels)}")
+            if compress:
+                logger.info(f"历史记录已压缩: {history_file} | 总频道: {len(channels)}")
             else:
                 logger.info(f"历史记录已保存: {history_file} | 总频道: {len(channels)}")
         except Exception as e:
             logger.error(f"历史记录导出失败: {str(e)}")
 
+    def _export_history_store(self, store: HistoryStore, channels: List[Channel]) -> None:
+        """历史记录追加到SQLite历史库，并按保留策略清理旧记录"""
+        try:
+            count = store.append_run(channels)
+            removed = store.compact(
+                self.config.getfloat('HISTORY', 'history_retention_days', fallback=0),
+                self.config.getint('HISTORY', 'history_max_runs', fallback=0)
+            )
+            logger.info(
+                f"历史记录已写入: {store.path} | 总频道: {count} | 保留运行: {store.run_count()}"
+                + (f" | 清理过期运行: {removed}" if removed else "")
+            )
+        except Exception as e:
+            logger.error(f"历史记录导出失败: {str(e)}")
+        finally:
+            store.close()
+
     def _get_m3u_header(self) -> str:
         """生成M3U文件头（从配置读取EPG地址）"""
         epg_url = self.config.get(
@@ -1,75 +1,409 @@
 import aiohttp
 import asyncio
 import logging
-from typing import List, Callable
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 import re
-from functools import lru_cache
+import time
+import codecs
+import configparser
+from collections import deque
+from urllib.parse import urlsplit
+from .source_cache import SourceCache
+from .local_source import LocalSource
 
 logger = logging.getLogger(__name__)
 
+# 字节序标记 -> 编码
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class _StreamDecoder:
+    """增量解码器（先缓冲有限的前缀样本用于编码检测，之后逐块解码）"""
+
+    def __init__(self, fetcher: "SourceFetcher", content_type: str):
+        self.fetcher = fetcher
+        self.content_type = content_type
+        self.encoding = None
+        self._decoder = None
+        self._sample: List[bytes] = []
+        self._sample_size = 0
+        self._parts: List[str] = []
+
+    def feed(self, chunk: bytes) -> None:
+        if self._decoder is None:
+            self._sample.append(chunk)
+            self._sample_size += len(chunk)
+            if self._sample_size < self.fetcher.sample_size:
+                return
+            self._start()
+            chunk = b''.join(self._sample)
+            self._sample = []
+        self._parts.append(self._decoder.decode(chunk))
+
+    def _start(self) -> None:
+        sample = b''.join(self._sample)
+        self.encoding = self.fetcher._detect_encoding(self.content_type, sample)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+
+    def finish(self) -> str:
+        if self._decoder is None:
+            self._start()
+            self._parts.append(self._decoder.decode(b''.join(self._sample)))
+            self._sample = []
+        self._parts.append(self._decoder.decode(b'', final=True))
+        text = ''.join(self._parts)
+        self._parts = []
+        return text
+
 class SourceFetcher:
     """订阅源获取器（带大小检查和智能重试）"""
     
     def __init__(self, timeout: float, concurrency: int, retries: int = 2, config=None):
         self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.concurrency = max(1, concurrency)
         self.semaphore = asyncio.Semaphore(concurrency)
         self.retries = retries
-        self.config = config or {}
+        self.config = config or configparser.ConfigParser()
         self.common_encodings = ['utf-8', 'gbk', 'latin-1']
         self.max_size = int(self.config.get('FETCHER', 'max_source_size', fallback=50 * 1024 * 1024))
+        self.chunk_size = self.config.getint('FETCHER', 'download_chunk_size', fallback=64 * 1024)
+        self.sample_size = self.config.getint('FETCHER', 'encoding_sample_size', fallback=64 * 1024)
+        
+        # 条件请求缓存
+        self.cache = None
+        self.serve_stale = self.config.getboolean('FETCHER', 'serve_stale_on_error', fallback=True)
+        if self.config.getboolean('FETCHER', 'enable_source_cache', fallback=False):
+            self.cache = SourceCache(
+                self.config.get('FETCHER', 'source_cache_dir', fallback='cache/sources'),
+                ttl=self.config.getfloat('FETCHER', 'source_cache_ttl', fallback=0)
+            )
+        self.cache_stats = {'fresh': 0, 'not_modified': 0, 'downloaded': 0, 'stale': 0}
+        
+        # 对冲请求与镜像竞速
+        self.enable_hedging = self.config.getboolean('FETCHER', 'enable_hedging', fallback=False)
+        self.hedge_delay = self.config.getfloat('FETCHER', 'hedge_delay', fallback=3.0)
+        self.hedge_percentile = self.config.getfloat('FETCHER', 'hedge_percentile', fallback=90)
+        self.hedge_min_samples = self.config.getint('FETCHER', 'hedge_min_samples', fallback=5)
+        self.mirror_templates = [
+            t.strip() for t in self.config.get('FETCHER', 'mirror_templates', fallback='').split(',') if t.strip()
+        ]
+        self.mirror_hosts = {
+            h.strip().lower() for h in
+            self.config.get('FETCHER', 'mirror_hosts', fallback='raw.githubusercontent.com').split(',') if h.strip()
+        }
+        self._latencies = deque(maxlen=256)
+        self.hedge_stats = {'hedged': 0, 'mirror_wins': 0}
+
+    @staticmethod
+    def split_source(spec: str) -> Tuple[str, List[str]]:
+        """
+        拆分订阅源配置行
+        格式: 主URL [镜像URL1 镜像URL2 ...]（空白分隔）
+        返回: (主URL, 镜像列表)
+        """
+        parts = spec.split()
+        if not parts:
+            return spec, []
+        return parts[0], parts[1:]
+
+    def _candidates(self, spec: str) -> List[str]:
+        """候选请求地址（主URL + 行内镜像 + 模板镜像）"""
+        primary, mirrors = self.split_source(spec)
+        candidates = [primary] + mirrors
+        if self.mirror_templates:
+            try:
+                host = (urlsplit(primary).hostname or '').lower()
+            except ValueError:
+                host = ''
+            if host in self.mirror_hosts:
+                candidates.extend(t.format(url=primary) for t in self.mirror_templates)
+        candidates = list(dict.fromkeys(candidates))
+        # 无镜像时对同一地址发起第二个请求（新连接）
+        if self.enable_hedging and len(candidates) == 1:
+            candidates.append(primary)
+        return candidates
+
+    def _current_hedge_delay(self) -> float:
+        """对冲等待时间：样本足够时取历史耗时的百分位，否则取配置值"""
+        if len(self._latencies) < self.hedge_min_samples:
+            return self.hedge_delay
+        samples = sorted(self._latencies)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return samples[index]
 
-    async def fetch_all(self, urls: List[str], progress_cb: Callable) -> List[str]:
-        """批量获取订阅源（带并发控制）"""
+    async def fetch_all(self, urls: List[str], progress_cb: Callable) -> List[Union[str, LocalSource]]:
+        """批量获取订阅源（带并发控制，本地文件源返回LocalSource）"""
         async with aiohttp.ClientSession(timeout=self.timeout) as session:
             tasks = [self._fetch_with_retry(session, url, progress_cb) for url in urls]
             return await asyncio.gather(*tasks)
 
-    async def _fetch_with_retry(self, session: aiohttp.ClientSession, url: str, progress_cb: Callable) -> str:
-        """带重试机制的请求处理"""
+    async def iter_sources(self, urls: List[str], progress_cb: Callable) -> AsyncIterator[Tuple[str, Union[str, LocalSource]]]:
+        """
+        流式获取订阅源（按完成顺序逐个产出）
+        在途请求数不超过并发上限，每取走一个结果才补充一个新请求，
+        因此内存中同时存在的源内容数量有界。
+        返回: (主url, content) 异步迭代器（失败的源content为空字符串）
+        """
+        url_iter = iter(urls)
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            in_flight: Dict[asyncio.Task, str] = {}
+
+            def launch() -> None:
+                for url in url_iter:
+                    task = asyncio.ensure_future(self._fetch_with_retry(session, url, progress_cb))
+                    in_flight[task] = url
+                    if len(in_flight) >= self.concurrency:
+                        return
+
+            launch()
+            try:
+                while in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        spec = in_flight.pop(task)
+                        # 先补充新请求再交出结果，消费者处理期间下载不中断
+                        launch()
+                        yield self.split_source(spec)[0], task.result()
+            finally:
+                for task in in_flight:
+                    task.cancel()
+
+    async def _fetch_with_retry(self, session: aiohttp.ClientSession, spec: str, progress_cb: Callable):
+        """带重试机制的请求处理（本地文件源返回LocalSource）"""
+        if LocalSource.is_local(spec):
+            try:
+                return self._open_local(spec)
+            except Exception as e:
+                logger.warning(f"本地订阅源读取失败: {spec} - {str(e)}")
+                return ''
+            finally:
+                progress_cb()
+
+        url = self.split_source(spec)[0]
+        candidates = self._candidates(spec)
         for attempt in range(self.retries + 1):
             try:
-                result = await self._fetch(session, url)
+                if len(candidates) > 1:
+                    result = await self._fetch_hedged(session, candidates)
+                else:
+                    result = await self._fetch(session, url)
                 progress_cb()
                 return result
             except Exception as e:
                 logger.warning(f"Attempt {attempt+1}/{self.retries+1} failed: {url} - {str(e)}")
                 if attempt == self.retries:
-                    return ""
+                    return self._serve_stale(url)
                 await asyncio.sleep(1 + attempt)
             finally:
                 progress_cb()
 
-    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> str:
-        """执行单次请求（带大小检查）"""
+    async def _fetch_hedged(self, session: aiohttp.ClientSession, candidates: List[str]) -> str:
+        """
+        对冲/镜像竞速请求
+        先请求主地址，该请求取得并发名额后开始计时，超过对冲等待时间未完成（或已失败）时启动下一个候选，
+        最先成功的响应获胜，其余请求取消。仍在排队等待名额的请求不会触发对冲。
+        """
+        loop = asyncio.get_running_loop()
+        in_flight: Dict[asyncio.Task, str] = {}
+        next_index = 0
+        last_error: Optional[BaseException] = None
+        holding: Optional[asyncio.Event] = None  # 最近启动的请求是否已取得并发名额
+        slot_wait: Optional[asyncio.Task] = None
+        hedge_at: Optional[float] = None
+
+        def launch() -> None:
+            nonlocal next_index, holding, slot_wait, hedge_at
+            candidate = candidates[next_index]
+            next_index += 1
+            if slot_wait is not None:
+                slot_wait.cancel()
+                slot_wait = None
+            holding = asyncio.Event()
+            hedge_at = None
+            task = asyncio.ensure_future(self._fetch(session, candidate, holding, source=candidates[0]))
+            in_flight[task] = candidate
+
+        launch()
+        try:
+            while in_flight:
+                waiters = set(in_flight)
+                wait_time = None
+                if next_index < len(candidates):
+                    if holding.is_set():
+                        if hedge_at is None:
+                            hedge_at = loop.time() + self._current_hedge_delay()
+                        wait_time = max(0.0, hedge_at - loop.time())
+                    else:
+                        if slot_wait is None:
+                            slot_wait = asyncio.ensure_future(holding.wait())
+                        waiters.add(slot_wait)
+
+                done, _ = await asyncio.wait(waiters, timeout=wait_time, return_when=asyncio.FIRST_COMPLETED)
+                if slot_wait is not None and slot_wait in done:
+                    # 取得名额，开始对冲计时
+                    done.discard(slot_wait)
+                    slot_wait = None
+                    if not done:
+                        continue
+                if not done:
+                    self.hedge_stats['hedged'] += 1
+                    logger.debug(f"对冲请求: {candidates[next_index]} (取得名额后 {self._current_hedge_delay():.2f}s 未完成)")
+                    launch()
+                    continue
+
+                for task in done:
+                    candidate = in_flight.pop(task)
+                    if task.exception() is None:
+                        if candidate != candidates[0]:
+                            self.hedge_stats['mirror_wins'] += 1
+                            logger.info(f"镜像优先返回: {candidate}")
+                        return task.result()
+                    last_error = task.exception()
+                    logger.debug(f"候选请求失败: {candidate} - {str(last_error)}")
+
+                # 全部在途请求都已失败时立即尝试下一个候选
+                if not in_flight and next_index < len(candidates):
+                    launch()
+        finally:
+            if slot_wait is not None:
+                slot_wait.cancel()
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        raise last_error or ValueError("所有候选地址均失败")
+
+    def _open_local(self, spec: str) -> LocalSource:
+        """打开本地文件源（只读取前缀样本检测编码，内容由解析器通过mmap逐行读取）"""
+        path = LocalSource.resolve(spec)
+        if path.stat().st_size > self.max_size:
+            raise ValueError(f"文件超过大小限制 ({self.max_size} bytes)")
+        source = LocalSource(path)
+        source.encoding = self._detect_encoding('', source.sample(self.sample_size))
+        return source
+
+    def log_cache_stats(self) -> None:
+        """输出订阅源缓存及对冲请求统计"""
+        if self.enable_hedging or self.mirror_templates or self.hedge_stats['mirror_wins']:
+            logger.info(
+                f"对冲请求 | 触发: {self.hedge_stats['hedged']} | 镜像胜出: {self.hedge_stats['mirror_wins']} | "
+                f"当前对冲等待: {self._current_hedge_delay():.2f}s"
+            )
+        if self.cache:
+            stats = self.cache_stats
+            logger.info(
+                f"订阅源缓存 | 免请求: {stats['fresh']} | 未修改(304): {stats['not_modified']} | "
+                f"完整下载: {stats['downloaded']} | 故障回退: {stats['stale']}"
+            )
+
+    def _serve_stale(self, url: str) -> str:
+        """源不可用时回退到缓存副本"""
+        if not (self.cache and self.serve_stale):
+            return ""
+        meta = self.cache.lookup(url)
+        if not meta:
+            return ""
+        logger.warning(f"源不可用，使用缓存副本: {url}")
+        self.cache_stats['stale'] += 1
+        return self._decode_cached(url, meta)
+
+    def _decode_cached(self, url: str, meta: Dict) -> str:
+        """分块读取并解码缓存副本"""
+        decoder = _StreamDecoder(self, meta.get('content_type', ''))
+        for chunk in self.cache.iter_body(url, self.chunk_size):
+            decoder.feed(chunk)
+        return decoder.finish()
+
+    async def _read_body(self, resp: aiohttp.ClientResponse, source: str, url: str) -> str:
+        """流式读取响应体（超限立即中止，边下载边解码/写缓存；缓存按订阅源source保存，记录实际地址url）"""
+        if resp.content_length is not None and resp.content_length > self.max_size:
+            raise ValueError(
+                f"Content too large ({resp.content_length/1024/1024:.1f}MB > {self.max_size/1024/1024:.1f}MB)"
+            )
+
+        decoder = _StreamDecoder(self, resp.headers.get('Content-Type', ''))
+        writer = self.cache.open_writer(source, url) if self.cache else None
+        size = 0
+        try:
+            async for chunk in resp.content.iter_chunked(self.chunk_size):
+                size += len(chunk)
+                if size > self.max_size:
+                    raise ValueError(
+                        f"Content too large (>{self.max_size/1024/1024:.1f}MB, aborted at {size/1024/1024:.1f}MB)"
+                    )
+                if writer:
+                    writer.write(chunk)
+                decoder.feed(chunk)
+            text = decoder.finish()
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+
+        if writer:
+            writer.commit(resp.headers)
+            self.cache_stats['downloaded'] += 1
+        return text
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str,
+                     holding: Optional[asyncio.Event] = None, source: Optional[str] = None) -> str:
+        """
+        执行单次请求（带大小检查和条件请求缓存）
+        holding: 取得并发名额时置位（对冲计时从此刻开始，排队时间不计入耗时统计）
+        source: 订阅源主URL（请求镜像时传入，缓存始终按主URL保存和查找）
+        """
+        source = source or url
+        meta = self.cache.lookup(source) if self.cache else None
+        if meta and self.cache.is_fresh(meta):
+            self.cache_stats['fresh'] += 1
+            return self._decode_cached(source, meta)
+
         async with self.semaphore:
+            if holding is not None:
+                holding.set()
+            start = time.perf_counter()
             headers = {'User-Agent': 'Mozilla/5.0'}
+            headers.update(SourceCache.conditional_headers(meta, url))
             async with session.get(url, headers=headers) as resp:
+                # 未修改：直接使用缓存
+                if resp.status == 304 and meta:
+                    self.cache.touch(source, meta)
+                    self.cache_stats['not_modified'] += 1
+                    self._latencies.append(time.perf_counter() - start)
+                    return self._decode_cached(source, meta)
+
                 # 检查状态码
                 if resp.status != 200:
                     raise ValueError(f"HTTP status {resp.status}")
                 
-                # 处理内容编码
-                raw_content = await resp.read()
-                
-                # 检查实际下载大小
-                if len(raw_content) > self.max_size:
-                    raise ValueError(
-                        f"Content too large ({len(raw_content)/1024/1024:.1f}MB > {self.max_size/1024/1024:.1f}MB)"
-                    )
-                
-                encoding = self._detect_encoding(resp.headers.get('Content-Type', ''), raw_content)
-                return raw_content.decode(encoding, errors='replace')
-
-    @lru_cache(maxsize=128)
-    def _detect_encoding(self, content_type: str, raw_content: bytes) -> str:
-        """检测内容编码（带缓存）"""
-        if 'charset=' in content_type:
-            if match := re.search(r'charset=([\w-]+)', content_type, re.IGNORECASE):
-                return match.group(1).lower()
+                text = await self._read_body(resp, source, url)
+                self._latencies.append(time.perf_counter() - start)
+                return text
+
+    def _detect_encoding(self, content_type: str, sample: bytes) -> str:
+        """检测内容编码（BOM → 响应头charset → 有限前缀样本试解码）"""
+        for bom, enc in _BOMS:
+            if sample.startswith(bom):
+                return enc
+        
+        if 'charset=' in content_type.lower():
+            if match := re.search(r'charset=["\']?([\w-]+)', content_type, re.IGNORECASE):
+                try:
+                    return codecs.lookup(match.group(1)).name
+                except LookupError:
+                    logger.debug(f"未知charset: {match.group(1)}")
         
         for enc in self.common_encodings:
             try:
-                raw_content.decode(enc)
+                # 样本末尾可能截断多字节字符，使用增量解码(final=False)容忍
+                codecs.getincrementaldecoder(enc)().decode(sample, final=False)
                 return enc
             except UnicodeDecodeError:
                 continue
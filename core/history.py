@@ -0,0 +1,230 @@
+import csv
+import gzip
+import logging
+import statistics
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 历史记录CSV列位置（与 ResultExporter._export_history 写入顺序一致）
+_COL_URL = 1
+_COL_STATUS = 4
+_COL_SPEED = 5
+
+
+def extract_host(url: str) -> str:
+    """快速提取URL主机名（小写，不含端口）"""
+    scheme_end = url.find('://')
+    if scheme_end < 0:
+        return ''
+    start = scheme_end + 3
+    end = len(url)
+    for sep in '/?#':
+        pos = url.find(sep, start)
+        if 0 <= pos < end:
+            end = pos
+    netloc = url[start:end].rpartition('@')[2].lower()
+    if netloc.startswith('['):
+        return netloc[1:netloc.find(']')] if ']' in netloc else ''
+    return netloc.partition(':')[0]
+
+
+@dataclass
+class SourceStats:
+    """单个URL/主机的历史测速统计"""
+    tests: int = 0
+    online: int = 0
+    last_online: float = 0.0  # 最近一次在线的时间戳（0表示从未在线）
+    speeds: Optional[List[float]] = None  # 在线时的速度(KB/s)，从未在线的源不分配列表以节省内存
+
+    @property
+    def reliability(self) -> float:
+        """在线率"""
+        return self.online / self.tests if self.tests else 0.0
+
+    @property
+    def smoothed_reliability(self) -> float:
+        """拉普拉斯平滑在线率（测试次数少时向0.5收缩）"""
+        return (self.online + 1) / (self.tests + 2)
+
+    @property
+    def median_speed(self) -> float:
+        """在线时的速度中位数"""
+        return statistics.median(self.speeds) if self.speeds else 0.0
+
+    def add(self, online: bool, speed: float, timestamp: float) -> None:
+        self.tests += 1
+        if online:
+            self.online += 1
+            if self.speeds is None:
+                self.speeds = []
+            self.speeds.append(speed)
+            if timestamp > self.last_online:
+                self.last_online = timestamp
+
+
+class HistoryIndex:
+    """历史测速结果索引（读取 history_*.csv[.gz] 或历史记录库，按URL和主机汇总在线率/速度/最近在线时间）"""
+
+    def __init__(self):
+        self.urls: Dict[str, SourceStats] = {}
+        self.hosts: Dict[str, SourceStats] = {}
+        self.files: List[Path] = []
+        self.runs = 0  # 已加载的运行次数
+
+    @staticmethod
+    def history_files(directory: str) -> List[Path]:
+        """历史文件列表（按文件名中的时间戳从旧到新排序）"""
+        path = Path(directory)
+        if not path.is_dir():
+            return []
+        return sorted(path.glob('history_*.csv*'), key=lambda p: p.name)
+
+    @classmethod
+    def from_directory(cls, directory: str, max_files: int = 1) -> "HistoryIndex":
+        """加载最近 max_files 个历史文件"""
+        index = cls()
+        for path in cls.history_files(directory)[-max(1, max_files):]:
+            index.load_file(path)
+        index.runs = len(index.files)
+        return index
+
+    @classmethod
+    def from_store(cls, store, max_runs: int = 1) -> "HistoryIndex":
+        """从历史记录库加载最近 max_runs 次运行"""
+        index = cls()
+        for url, status, speed, started_at in store.iter_recent(max(1, max_runs)):
+            if status == 'online' or status == 'offline':
+                index.record(url, status == 'online', speed, started_at)
+        index.runs = min(max(1, max_runs), store.run_count())
+        return index
+
+    @classmethod
+    def from_config(cls, config) -> "HistoryIndex":
+        """
+        按 [HISTORY] 配置加载（history_files<=0 时返回空索引）
+        使用SQLite历史库且库中已有记录时从库加载，否则读取历史CSV文件
+        """
+        max_files = config.getint('HISTORY', 'history_files', fallback=3)
+        if max_files <= 0:
+            return cls()
+
+        from .history_store import HistoryStore
+        store = HistoryStore.from_config(config)
+        if store is not None:
+            try:
+                if store.run_count():
+                    index = cls.from_store(store, max_files)
+                    logger.info(f"历史索引加载完成 | 运行: {index.runs} | URL: {len(index.urls)} | 主机: {len(index.hosts)}")
+                    return index
+            finally:
+                store.close()
+
+        index = cls.from_directory(
+            config.get('PATHS', 'csv_output_path', fallback='outputs/history'),
+            max_files
+        )
+        if index.files:
+            logger.info(f"历史索引加载完成 | 文件: {len(index.files)} | URL: {len(index.urls)} | 主机: {len(index.hosts)}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __bool__(self) -> bool:
+        return bool(self.urls)
+
+    @staticmethod
+    def _iter_rows(path: Path) -> Iterator[List[str]]:
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, 'rt', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # 表头
+            yield from reader
+
+    @staticmethod
+    def _file_timestamp(path: Path) -> float:
+        """从文件名 history_YYYYmmdd_HHMMSS 解析时间，失败时使用修改时间"""
+        stem = path.name.split('.', 1)[0]
+        try:
+            return datetime.strptime(stem[len('history_'):], '%Y%m%d_%H%M%S').timestamp()
+        except ValueError:
+            return path.stat().st_mtime
+
+    def load_file(self, path: Path) -> None:
+        """加载一个历史文件（只统计online/offline记录）"""
+        try:
+            timestamp = self._file_timestamp(path)
+            for row in self._iter_rows(path):
+                if len(row) <= _COL_SPEED:
+                    continue
+                status = row[_COL_STATUS]
+                if status != 'online' and status != 'offline':
+                    continue
+                try:
+                    speed = float(row[_COL_SPEED])
+                except ValueError:
+                    speed = 0.0
+                self.record(row[_COL_URL], status == 'online', speed, timestamp)
+        except Exception as e:
+            logger.warning(f"历史记录读取失败: {path} - {str(e)}")
+            return
+        self.files.append(path)
+
+    def record(self, url: str, online: bool, speed: float = 0.0, timestamp: float = 0.0) -> None:
+        """记录一次测速结果"""
+        stats = self.urls.get(url)
+        if stats is None:
+            stats = self.urls[url] = SourceStats()
+        stats.add(online, speed, timestamp)
+
+        host = extract_host(url)
+        if host:
+            host_stats = self.hosts.get(host)
+            if host_stats is None:
+                host_stats = self.hosts[host] = SourceStats()
+            host_stats.add(online, speed, timestamp)
+
+    def url_reliability(self, url: str) -> Optional[float]:
+        """URL历史在线率，无记录返回None"""
+        stats = self.urls.get(url)
+        return stats.reliability if stats else None
+
+    def host_reliability(self, host: str) -> Optional[float]:
+        """主机历史在线率，无记录返回None"""
+        stats = self.hosts.get(host)
+        return stats.reliability if stats else None
+
+    def likelihood(self, url: str, prior: float = 0.5) -> float:
+        """
+        URL本次在线的估计概率
+        优先使用URL自身的平滑在线率，无记录时使用所在主机的平滑在线率，都没有时返回先验值
+        """
+        stats = self.urls.get(url)
+        if stats is not None:
+            return stats.smoothed_reliability
+        stats = self.hosts.get(extract_host(url))
+        if stats is not None:
+            return stats.smoothed_reliability
+        return prior
+
+    def is_chronically_dead(self, url: str, min_tests: int = 3) -> bool:
+        """URL（或其主机）在至少 min_tests 次历史测速中从未在线"""
+        stats = self.urls.get(url)
+        if stats is not None and stats.tests >= min_tests:
+            return stats.online == 0
+        stats = self.hosts.get(extract_host(url))
+        return stats is not None and stats.tests >= min_tests * 3 and stats.online == 0
+
+    def median_speed(self, url: str) -> float:
+        """URL在线时的速度中位数（无记录为0）"""
+        stats = self.urls.get(url)
+        return stats.median_speed if stats else 0.0
+
+    def last_seen_online(self, url: str) -> float:
+        """URL最近一次在线的时间戳（从未在线为0）"""
+        stats = self.urls.get(url)
+        return stats.last_online if stats else 0.0
@@ -0,0 +1,321 @@
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .models import Channel
+from .history import HistoryIndex, extract_host
+
+logger = logging.getLogger(__name__)
+
+# 批量写入的行数
+_WRITE_BATCH = 5000
+
+# 默认延迟分位数
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class UptimeStats:
+    """在线率与延迟分位数（延迟只统计在线记录，单位ms）"""
+    tests: int = 0
+    online: int = 0
+    last_online: float = 0.0
+    latency: Dict[int, float] = field(default_factory=dict)
+
+    @property
+    def uptime(self) -> float:
+        return self.online / self.tests if self.tests else 0.0
+
+
+def _url_hash(url: str) -> int:
+    """URL的64位哈希（urls表只对哈希建索引，避免URL文本在索引中再存一份）"""
+    digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def _percentiles(values: List[float], percentiles: Sequence[int]) -> Dict[int, float]:
+    """最近秩法分位数（第 ceil(p/100*n) 个值）"""
+    if not values:
+        return {}
+    values.sort()
+    last = len(values) - 1
+    return {p: values[min(last, max(0, math.ceil(p / 100 * len(values)) - 1))] for p in percentiles}
+
+
+class HistoryStore:
+    """追加式历史测速记录库（SQLite）
+
+    每次运行追加一条 runs 记录和该次所有频道的测速结果。
+    名称/分类/状态等重复字符串存入 strings 表、URL 存入 urls 表（附主机），
+    结果表只保存整数ID和数值，同一URL在多次运行中只存一份文本。
+    结果表按 (url_id, run_id) 聚簇存放，按URL查询无需额外索引；
+    按频道名查询（channel_stats）走全表扫描，不为名称维护索引。
+
+    表结构:
+        runs(id, started_at)
+        strings(id, value)
+        urls(id, url, url_hash, host_id)
+        results(url_id, run_id, name_id, category_id, original_category_id, status_id, speed, latency)
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        # auto_vacuum 只能在建表前设置，compact() 时增量回收空间
+        self._conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                ' id INTEGER PRIMARY KEY,'
+                ' started_at REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS strings ('
+                ' id INTEGER PRIMARY KEY,'
+                ' value TEXT NOT NULL UNIQUE);'
+                'CREATE TABLE IF NOT EXISTS urls ('
+                ' id INTEGER PRIMARY KEY,'
+                ' url TEXT NOT NULL,'
+                ' url_hash INTEGER NOT NULL,'
+                ' host_id INTEGER NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' url_id INTEGER NOT NULL,'
+                ' run_id INTEGER NOT NULL,'
+                ' name_id INTEGER NOT NULL,'
+                ' category_id INTEGER NOT NULL,'
+                ' original_category_id INTEGER NOT NULL,'
+                ' status_id INTEGER NOT NULL,'
+                ' speed REAL NOT NULL,'
+                ' latency INTEGER NOT NULL,'
+                ' PRIMARY KEY (url_id, run_id)'
+                ') WITHOUT ROWID;'
+                'CREATE INDEX IF NOT EXISTS idx_urls_hash ON urls(url_hash);'
+                'CREATE INDEX IF NOT EXISTS idx_urls_host ON urls(host_id);'
+            )
+        # 驻留缓存（首次写入时从库中加载）
+        self._string_ids: Optional[Dict[str, int]] = None
+        self._url_ids: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional["HistoryStore"]:
+        """[HISTORY] history_backend=sqlite 时创建，否则返回None"""
+        if config.get('HISTORY', 'history_backend', fallback='csv').strip().lower() != 'sqlite':
+            return None
+        try:
+            return cls(config.get('HISTORY', 'history_db_path', fallback='cache/history.sqlite'))
+        except Exception as e:
+            logger.warning(f"历史记录库打开失败: {str(e)}")
+            return None
+
+    # ==================== 写入 ====================
+
+    def _load_interned(self) -> None:
+        if self._string_ids is None:
+            self._string_ids = {value: sid for sid, value in self._conn.execute('SELECT id, value FROM strings')}
+            self._url_ids = {url: uid for uid, url in self._conn.execute('SELECT id, url FROM urls')}
+
+    def _string_id(self, value: str) -> int:
+        sid = self._string_ids.get(value)
+        if sid is None:
+            sid = self._conn.execute('INSERT INTO strings (value) VALUES (?)', (value,)).lastrowid
+            self._string_ids[value] = sid
+        return sid
+
+    def _url_id(self, url: str) -> int:
+        uid = self._url_ids.get(url)
+        if uid is None:
+            uid = self._conn.execute(
+                'INSERT INTO urls (url, url_hash, host_id) VALUES (?, ?, ?)',
+                (url, _url_hash(url), self._string_id(extract_host(url)))
+            ).lastrowid
+            self._url_ids[url] = uid
+        return uid
+
+    def append_run(self, channels: Iterable[Channel], started_at: Optional[float] = None) -> int:
+        """
+        追加一次运行的全部频道结果（单事务，分批写入，不产生临时文件；延迟按整毫秒保存）
+        同一次运行中同一URL只保留首条记录
+        返回: 写入的记录数
+        """
+        self._load_interned()
+        count = 0
+        try:
+            with self._conn:
+                run_id = self._conn.execute(
+                    'INSERT INTO runs (started_at) VALUES (?)',
+                    (time.time() if started_at is None else started_at,)
+                ).lastrowid
+                batch: List[Tuple] = []
+                for ch in channels:
+                    batch.append((
+                        self._url_id(ch.url), run_id, self._string_id(ch.name),
+                        self._string_id(ch.category), self._string_id(ch.original_category),
+                        self._string_id(ch.status), float(ch.download_speed or 0), round(ch.response_time or 0)
+                    ))
+                    if len(batch) >= _WRITE_BATCH:
+                        self._insert_results(batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    self._insert_results(batch)
+                    count += len(batch)
+        except Exception:
+            # 事务已回滚，驻留缓存中可能含有未提交的ID
+            self._string_ids = self._url_ids = None
+            raise
+        return count
+
+    def _insert_results(self, rows: List[Tuple]) -> None:
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO results (url_id, run_id, name_id, category_id, original_category_id, '
+            'status_id, speed, latency) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def import_csv(self, path: Path) -> int:
+        """导入旧版 history_*.csv[.gz] 文件（运行时间取自文件名）"""
+        def rows() -> Iterator[Channel]:
+            for row in HistoryIndex._iter_rows(path):
+                if len(row) < 7:
+                    continue
+                try:
+                    speed, latency = float(row[5] or 0), float(row[6] or 0)
+                except ValueError:
+                    speed = latency = 0.0
+                yield Channel(row[0], row[1], row[2], row[3], row[4], latency, speed)
+        return self.append_run(rows(), HistoryIndex._file_timestamp(path))
+
+    # ==================== 保留与压缩 ====================
+
+    def compact(self, retention_days: float = 0, max_runs: int = 0) -> int:
+        """
+        删除超出保留期限/次数的运行记录，清理不再被引用的字符串和URL并回收空间
+        返回: 删除的运行数
+        """
+        conditions, params = [], []
+        if retention_days > 0:
+            conditions.append('started_at < ?')
+            params.append(time.time() - retention_days * 86400)
+        if max_runs > 0:
+            conditions.append('id NOT IN (SELECT id FROM runs ORDER BY started_at DESC LIMIT ?)')
+            params.append(max_runs)
+        if not conditions:
+            return 0
+
+        expired = [r for r, in self._conn.execute(f'SELECT id FROM runs WHERE {" OR ".join(conditions)}', params)]
+        if not expired:
+            return 0
+        with self._conn:
+            self._conn.executemany('DELETE FROM results WHERE run_id = ?', [(r,) for r in expired])
+            self._conn.executemany('DELETE FROM runs WHERE id = ?', [(r,) for r in expired])
+            self._conn.execute('DELETE FROM urls WHERE id NOT IN (SELECT DISTINCT url_id FROM results)')
+            self._conn.execute(
+                'DELETE FROM strings WHERE id NOT IN ('
+                ' SELECT name_id FROM results UNION SELECT category_id FROM results'
+                ' UNION SELECT original_category_id FROM results UNION SELECT status_id FROM results'
+                ' UNION SELECT host_id FROM urls)'
+            )
+        # 每返回一行释放一页，需读完
+        self._conn.execute('PRAGMA incremental_vacuum').fetchall()
+        self._string_ids = self._url_ids = None
+        return len(expired)
+
+    # ==================== 查询 ====================
+
+    def run_count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+    def iter_recent(self, max_runs: int = 0) -> Iterator[Tuple[str, str, float, float]]:
+        """
+        按时间从旧到新遍历最近 max_runs 次运行的结果（0表示全部）
+        产出: (url, status, speed, started_at)
+        """
+        runs = 'SELECT id FROM runs ORDER BY started_at DESC' + (' LIMIT ?' if max_runs > 0 else '')
+        yield from self._conn.execute(
+            'SELECT u.url, s.value, r.speed, runs.started_at FROM results r'
+            ' JOIN runs ON runs.id = r.run_id'
+            ' JOIN urls u ON u.id = r.url_id'
+            ' JOIN strings s ON s.id = r.status_id'
+            f' WHERE r.run_id IN ({runs}) ORDER BY runs.started_at',
+            (max_runs,) if max_runs > 0 else ()
+        )
+
+    def _stats(self, where: str, params: Tuple, since: Optional[float],
+               percentiles: Sequence[int]) -> UptimeStats:
+        sql = (
+            'SELECT s.value, r.latency, runs.started_at FROM results r'
+            ' JOIN runs ON runs.id = r.run_id'
+            ' JOIN strings s ON s.id = r.status_id'
+            f' WHERE {where}'
+        )
+        if since is not None:
+            sql += ' AND runs.started_at >= ?'
+            params += (since,)
+        stats = UptimeStats()
+        latencies: List[float] = []
+        for status, latency, started_at in self._conn.execute(sql, params):
+            if status != 'online' and status != 'offline':
+                continue
+            stats.tests += 1
+            if status == 'online':
+                stats.online += 1
+                latencies.append(latency)
+                stats.last_online = max(stats.last_online, started_at)
+        stats.latency = _percentiles(latencies, percentiles)
+        return stats
+
+    def url_stats(self, url: str, since: Optional[float] = None,
+                  percentiles: Sequence[int] = DEFAULT_PERCENTILES) -> UptimeStats:
+        """单个URL的在线率和延迟分位数（since为起始时间戳）"""
+        return self._stats(
+            'r.url_id = (SELECT id FROM urls WHERE url_hash = ? AND url = ?)',
+            (_url_hash(url), url), since, percentiles
+        )
+
+    def host_stats(self, host: str, since: Optional[float] = None,
+                   percentiles: Sequence[int] = DEFAULT_PERCENTILES) -> UptimeStats:
+        """主机下所有URL的在线率和延迟分位数"""
+        return self._stats(
+            'r.url_id IN (SELECT u.id FROM urls u JOIN strings h ON h.id = u.host_id WHERE h.value = ?)',
+            (host.lower(),), since, percentiles
+        )
+
+    def channel_stats(self, name: str, since: Optional[float] = None,
+                      percentiles: Sequence[int] = DEFAULT_PERCENTILES) -> UptimeStats:
+        """
+        频道（按名称）的在线率和延迟分位数
+        在线率按运行统计：一次运行中任一源在线即视为该频道在线；延迟统计所有在线源
+        """
+        sql = (
+            'SELECT r.run_id, s.value, r.latency, runs.started_at FROM results r'
+            ' JOIN runs ON runs.id = r.run_id'
+            ' JOIN strings s ON s.id = r.status_id'
+            ' WHERE r.name_id = (SELECT id FROM strings WHERE value = ?)'
+        )
+        params: Tuple = (name,)
+        if since is not None:
+            sql += ' AND runs.started_at >= ?'
+            params += (since,)
+        tested: Dict[int, bool] = {}
+        stats = UptimeStats()
+        latencies: List[float] = []
+        for run_id, status, latency, started_at in self._conn.execute(sql, params):
+            if status != 'online' and status != 'offline':
+                continue
+            online = status == 'online'
+            tested[run_id] = tested.get(run_id, False) or online
+            if online:
+                latencies.append(latency)
+                stats.last_online = max(stats.last_online, started_at)
+        stats.tests = len(tested)
+        stats.online = sum(tested.values())
+        stats.latency = _percentiles(latencies, percentiles)
+        return stats
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+
+@dataclass
+class HlsVariant:
+    """主播放列表中的一个码率档位"""
+    url: str
+    bandwidth: int = 0  # bit/s，未声明为0
+
+
+@dataclass
+class HlsSegment:
+    """媒体播放列表中的一个分片"""
+    url: str
+    duration: float = 0.0
+    byte_range: Optional[Tuple[int, int]] = None  # (起始偏移, 长度)
+
+
+@dataclass
+class HlsPlaylist:
+    """解析后的HLS播放列表（主列表只有variants，媒体列表只有segments）"""
+    variants: List[HlsVariant] = field(default_factory=list)
+    segments: List[HlsSegment] = field(default_factory=list)
+    target_duration: float = 0.0
+    ended: bool = False  # 含 #EXT-X-ENDLIST（点播）
+
+    @property
+    def is_master(self) -> bool:
+        return bool(self.variants)
+
+    def lowest_variant(self) -> Optional[HlsVariant]:
+        """码率最低的档位（都未声明码率时取第一个）"""
+        if not self.variants:
+            return None
+        declared = [v for v in self.variants if v.bandwidth > 0]
+        return min(declared, key=lambda v: v.bandwidth) if declared else self.variants[0]
+
+    def probe_segment(self) -> Optional[HlsSegment]:
+        """
+        选取测速分片：直播取倒数第3个（播放器起播位置附近，服务器上一定已生成），
+        点播取第一个
+        """
+        if not self.segments:
+            return None
+        if self.ended:
+            return self.segments[0]
+        return self.segments[-min(3, len(self.segments))]
+
+
+def is_playlist(data: bytes) -> bool:
+    """内容是否为M3U8播放列表"""
+    return data.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'#EXTM3U')
+
+
+def _attribute(line: str, name: str) -> str:
+    """读取标签属性值（如 BANDWIDTH=1280000）"""
+    pos = line.find(name + '=')
+    while pos > 0 and line[pos - 1] not in ':,':
+        pos = line.find(name + '=', pos + 1)
+    if pos < 0:
+        return ''
+    value = line[pos + len(name) + 1:]
+    if value.startswith('"'):
+        return value[1:].split('"', 1)[0]
+    return value.split(',', 1)[0]
+
+
+def parse_playlist(text: str, base_url: str) -> HlsPlaylist:
+    """解析M3U8文本，相对地址按 base_url 解析为绝对地址"""
+    playlist = HlsPlaylist()
+    pending_variant: Optional[HlsVariant] = None
+    pending_duration: Optional[float] = None
+    pending_range: Optional[Tuple[int, int]] = None
+    next_offset = 0
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            if line.startswith('#EXT-X-STREAM-INF'):
+                try:
+                    bandwidth = int(_attribute(line, 'BANDWIDTH') or 0)
+                except ValueError:
+                    bandwidth = 0
+                pending_variant = HlsVariant('', bandwidth)
+            elif line.startswith('#EXTINF:'):
+                try:
+                    pending_duration = float(line[8:].split(',', 1)[0])
+                except ValueError:
+                    pending_duration = 0.0
+            elif line.startswith('#EXT-X-BYTERANGE:'):
+                length, _, offset = line[17:].partition('@')
+                try:
+                    start = int(offset) if offset else next_offset
+                    pending_range = (start, int(length))
+                    next_offset = start + int(length)
+                except ValueError:
+                    pending_range = None
+            elif line.startswith('#EXT-X-TARGETDURATION:'):
+                try:
+                    playlist.target_duration = float(line[22:])
+                except ValueError:
+                    pass
+            elif line.startswith('#EXT-X-ENDLIST'):
+                playlist.ended = True
+            continue
+
+        url = urljoin(base_url, line)
+        if pending_variant is not None:
+            pending_variant.url = url
+            playlist.variants.append(pending_variant)
+            pending_variant = None
+        elif pending_duration is not None:
+            playlist.segments.append(HlsSegment(url, pending_duration, pending_range))
+            pending_duration = None
+            pending_range = None
+    return playlist
@@ -0,0 +1,88 @@
+import mmap
+import codecs
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+
+class LocalSource:
+    """本地订阅源（mmap映射后逐行解码，不生成整个文件的字符串副本）
+
+    只保存路径和编码，可直接传给解析工作进程，由工作进程自行映射文件。
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.size = self.path.stat().st_size
+
+    @staticmethod
+    def is_local(spec: str) -> bool:
+        """file:// 地址或不含协议的文件路径"""
+        return spec.startswith('file://') or '://' not in spec
+
+    @staticmethod
+    def resolve(spec: str) -> Path:
+        """将 file:// 地址或普通路径转换为本地路径"""
+        if spec.startswith('file://'):
+            parts = urlsplit(spec)
+            path = url2pathname(parts.path)
+            if parts.netloc and parts.netloc != 'localhost':
+                path = f"//{parts.netloc}{path}"
+            return Path(path)
+        return Path(spec).expanduser()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"LocalSource({str(self.path)!r}, {self.encoding!r})"
+
+    @contextmanager
+    def _mapped(self) -> Iterator[mmap.mmap]:
+        with open(self.path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mm
+            finally:
+                mm.close()
+
+    def sample(self, size: int) -> bytes:
+        """读取文件开头的样本（用于编码检测）"""
+        if not self.size:
+            return b''
+        with self._mapped() as mm:
+            return mm[:size]
+
+    def iter_lines(self) -> Iterator[str]:
+        """逐行解码（切分结果与整体解码后 str.splitlines() 一致）"""
+        if not self.size:
+            return
+        if codecs.lookup(self.encoding).name.startswith(('utf-16', 'utf-32')):
+            # UTF-16/32 的换行不是单字节，无法按字节行切分
+            yield from self.read_text().splitlines()
+            return
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        with self._mapped() as mm:
+            for raw in iter(mm.readline, b''):
+                # 行内可能还有 \r 等其它行分隔符
+                yield from decoder.decode(raw).splitlines()
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+
+    def read_text(self) -> str:
+        """解码整个文件（仅用于不支持逐行解析的场景）"""
+        if not self.size:
+            return ''
+        with self._mapped() as mm:
+            return codecs.decode(mm, self.encoding, errors='replace')
+
+    def update_hash(self, h) -> None:
+        """将文件内容（直接读取映射内存）写入哈希对象"""
+        h.update(self.encoding.encode('ascii'))
+        if self.size:
+            with self._mapped() as mm:
+                h.update(mm)
@@ -1,22 +1,130 @@
+import os
 import re
+import json
 import time
+import hashlib
 import logging
-from typing import Dict, List, Set, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 from .models import Channel
+from .automaton import AhoCorasick
+from .cache import LRUCache
 import configparser
 from collections import defaultdict
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# 模板缓存格式版本（缓存结构变化时递增，使旧缓存自动失效）
+TEMPLATE_CACHE_VERSION = 1
+
 @dataclass
 class MatchCache:
     """分类匹配缓存数据结构（优化内存使用）"""
     category: str
     normalized_name: str
 
+class CategoryEngine:
+    """单次扫描分类引擎（字面量走Aho-Corasick快速路径，正则按分类合并为一条交替式）
+
+    匹配结果与逐条re.search一致：按模板分类顺序，返回第一个有任意规则命中的分类。
+    """
+
+    # 出现这些字符之一即视为正则（否则re.search等价于子串包含）
+    REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+    # 依赖分组编号/名称的写法：反向引用 \1、(?P=name)、条件分组 (?(1)...)、命名分组 (?P<name>...)
+    # 合并为交替式后分组编号整体偏移、同名分组冲突，这类规则必须单独编译
+    GROUP_DEPENDENT = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?P[=<]|\(\?\(')
+
+    def __init__(self, categories: List[Tuple[str, List[str]]]):
+        """
+        编译分类规则
+
+        参数:
+            categories: [(分类名, [规则源码...])]，须按模板顺序排列
+        """
+        self.category_names: List[str] = []
+        literal_owner: Dict[str, int] = {}
+        self._regex_rules: List[Tuple[int, List[re.Pattern]]] = []
+
+        for category, sources in categories:
+            index = len(self.category_names)
+            self.category_names.append(category)
+            regex_sources = []
+            for source in sources:
+                literal = self._as_literal(source)
+                if literal is not None:
+                    # 同一字面量只归属最先出现的分类
+                    literal_owner.setdefault(literal, index)
+                else:
+                    regex_sources.append(source)
+            if regex_sources:
+                self._regex_rules.append((index, self._compile_alternation(regex_sources)))
+
+        literals = [l for l in literal_owner if l]
+        self._literal_category = [literal_owner[l] for l in literals]
+        self._automaton = AhoCorasick(literals)
+        # 空字面量（如".*"）命中任意名称
+        self._always_index = literal_owner.get('', len(self.category_names))
+
+    @classmethod
+    def _as_literal(cls, source: str) -> str:
+        """若规则在search语义下等价于子串包含，返回该子串，否则返回None"""
+        core = source
+        while core.startswith('.*'):
+            core = core[2:]
+        while core.endswith('.*') and not core.endswith('\\.*'):
+            core = core[:-2]
+        if cls.REGEX_METACHARS.isdisjoint(core):
+            return core
+        return None
+
+    @classmethod
+    def _compile_alternation(cls, sources: List[str]) -> List[re.Pattern]:
+        """
+        合并为一条交替式正则；依赖分组编号/名称的规则单独编译，
+        其余规则合并失败（如非开头位置的内联标志）时退回逐条编译
+        """
+        standalone = [s for s in sources if cls.GROUP_DEPENDENT.search(s)]
+        mergeable = [s for s in sources if not cls.GROUP_DEPENDENT.search(s)]
+        patterns: List[re.Pattern] = []
+        if mergeable:
+            try:
+                patterns.append(re.compile('|'.join(f'(?:{s})' for s in mergeable)))
+            except re.error:
+                patterns.extend(re.compile(s) for s in mergeable)
+        patterns.extend(re.compile(s) for s in standalone)
+        return patterns
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._automaton) + sum(len(p) for _, p in self._regex_rules)
+
+    def match(self, name: str) -> Optional[str]:
+        """返回第一个命中的分类名，未命中返回None"""
+        best = self._always_index
+        literal_category = self._literal_category
+        for _, pattern_id in self._automaton.iter_matches(name):
+            index = literal_category[pattern_id]
+            if index < best:
+                best = index
+
+        # 仅需检查排在当前最优分类之前的正则分类
+        for index, patterns in self._regex_rules:
+            if index >= best:
+                break
+            if any(p.search(name) for p in patterns):
+                best = index
+                break
+
+        if best < len(self.category_names):
+            return self.category_names[best]
+        return None
+
+
 class AutoCategoryMatcher:
     """智能分类匹配器（高性能优化版）"""
 
@@ -33,14 +141,34 @@ class AutoCategoryMatcher:
         self.enable_space_clean = self.config.getboolean('MATCHER', 'enable_space_clean', fallback=True)
         
         # 初始化缓存和统计
-        self.match_cache: Dict[str, MatchCache] = {}
-        self.name_normalization_cache: Dict[str, str] = {}
-        self.template_order_cache: Dict[tuple, Dict[str, int]] = {}  # {channel_names_tuple: {name: index}}
+        cache_size = self.config.getint('MATCHER', 'match_cache_size', fallback=200000)
+        self.match_cache = LRUCache(cache_size, 'match_cache')  # {channel_name: MatchCache}
+        self.name_normalization_cache = LRUCache(cache_size, 'name_normalization_cache')  # {name: normalized}
+        self.template_order_cache = LRUCache(
+            self.config.getint('MATCHER', 'template_order_cache_size', fallback=1024),
+            'template_order_cache'
+        )  # {category: {name: index}}
+        
+        # 模板缓存
+        cache_path = self.config.get('MATCHER', 'template_cache_path', fallback='cache/template_cache.json')
+        enable_template_cache = self.config.getboolean('MATCHER', 'enable_template_cache', fallback=True)
+        self.template_cache_path = Path(cache_path) if enable_template_cache and cache_path else None
+        
+        # 加载模板数据（单遍解析，结果按内容哈希缓存）
+        template = self._load_template()
+        self.categories: Dict[str, List[str]] = dict(template['categories'])
+        self.standard_names: Dict[str, str] = template['standard_names']
+        self.suffixes: List[str] = template['suffixes']
+        self.template_order: Dict[str, List[str]] = template['template_order']
+        self.engine = CategoryEngine(template['categories'])
         
-        # 加载模板数据
-        self.categories, self.standard_names = self._parse_template()
-        self.suffixes = self._extract_suffixes()
-        self.template_order = self._load_template_order()
+        # 跨运行的分类结果缓存（按模板哈希失效）
+        result_cache_path = self.config.get('MATCHER', 'result_cache_path', fallback='cache/match_results.json')
+        enable_result_cache = self.config.getboolean('MATCHER', 'enable_result_cache', fallback=False)
+        self.result_cache_path = Path(result_cache_path) if enable_result_cache and result_cache_path else None
+        self._result_cache_loaded = 0
+        if self.result_cache_path:
+            self._load_result_cache()
         
         logger.info(f"分类器初始化完成 | 模板规则: {sum(len(p) for p in self.categories.values())}条")
 
@@ -56,120 +184,175 @@ class AutoCategoryMatcher:
         # 3. 合并多余空格
         return re.sub(r'\s+', ' ', cleaned)
 
-    def _extract_suffixes(self) -> List[str]:
-        """从模板中提取后缀配置（优化：使用正则预编译）"""
-        suffix_pattern = re.compile(r'#suffixes:(.*)')
-        try:
-            with open(self.template_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if match := suffix_pattern.search(line):
-                        return [s.strip().lower() for s in match.group(1).split(',') if s.strip()]
-        except Exception as e:
-            logger.error(f"后缀提取失败: {str(e)}")
-        return ["高清", "hd", "综合"]  # 默认后缀
-
-    def _parse_template(self) -> Tuple[Dict[str, List[re.Pattern]], Dict[str, str]]:
+    def _load_template(self) -> Dict:
         """
-        解析模板文件（优化：并行处理+预编译正则）
-        返回: (categories, standard_names)
+        加载模板（优先读取磁盘缓存，模板内容变化时自动失效）
+        返回: {'categories', 'standard_names', 'suffixes', 'template_order'}
         """
-        categories = defaultdict(list)
-        standard_names = {}
-        current_category = None
-        
         try:
-            with open(self.template_path, 'r', encoding='utf-8') as f:
-                lines = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-                
-                # 并行处理正则编译
-                with ThreadPoolExecutor() as executor:
-                    futures = []
-                    for line in lines:
-                        if line.endswith(',#genre#'):
-                            current_category = line.split(',')[0]
-                            continue
-                            
-                        if current_category:
-                            parts = line.split('|')
-                            standard_name = parts[0].strip()
-                            futures.append(
-                                executor.submit(
-                                    self._compile_patterns,
-                                    parts,
-                                    current_category,
-                                    standard_name
-                                )
-                            )
-                    
-                    for future in as_completed(futures):
-                        category, patterns, name_mappings = future.result()
-                        categories[category].extend(patterns)
-                        standard_names.update(name_mappings)
-                        
+            with open(self.template_path, 'rb') as f:
+                raw = f.read()
         except Exception as e:
             logger.error(f"模板解析失败: {str(e)}")
             raise
-            
-        return dict(categories), standard_names
 
-    def _compile_patterns(self, parts: List[str], category: str, standard_name: str) -> Tuple[str, List[re.Pattern], Dict[str, str]]:
-        """编译正则模式并构建名称映射（子任务函数）"""
-        patterns = []
-        name_mappings = {}
-        
-        for name in parts:
-            name = name.strip()
-            if not name:
+        self.template_hash = self._template_key(raw)
+        if self.template_cache_path:
+            cached = self._read_template_cache()
+            if cached is not None:
+                logger.debug(f"模板缓存命中: {self.template_cache_path}")
+                return cached
+
+        template = self._parse_template(raw.decode('utf-8'))
+        if self.template_cache_path:
+            self._write_template_cache(template)
+        return template
+
+    def _template_key(self, raw: bytes) -> str:
+        """模板缓存键（模板内容 + 影响解析结果的配置）"""
+        digest = hashlib.sha256(raw)
+        digest.update(f"|v{TEMPLATE_CACHE_VERSION}|space_clean={self.enable_space_clean}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _read_template_cache(self) -> Optional[Dict]:
+        """读取模板缓存，键不匹配或文件损坏时返回None"""
+        try:
+            with open(self.template_cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') != self.template_hash:
+                return None
+            return cached['template']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"模板缓存读取失败，将重新解析: {str(e)}")
+            return None
+
+    def _write_template_cache(self, template: Dict) -> None:
+        """原子写入模板缓存"""
+        try:
+            self.template_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.template_cache_path.with_name(self.template_cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': self.template_hash, 'template': template}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.template_cache_path)
+        except Exception as e:
+            logger.warning(f"模板缓存写入失败: {str(e)}")
+
+    def _parse_template(self, text: str) -> Dict:
+        """
+        单遍解析模板文本（分类顺序、规则源码、标准名称映射、后缀、频道顺序）
+        """
+        categories: Dict[str, List[str]] = {}
+        standard_names: Dict[str, str] = {}
+        template_order: Dict[str, List[str]] = {}
+        suffixes = None
+        current_category = None
+
+        for line in text.splitlines():
+            if suffixes is None and '#suffixes:' in line:
+                value = line.split('#suffixes:', 1)[1]
+                suffixes = [s.strip().lower() for s in value.split(',') if s.strip()]
+
+            line = line.strip()
+            if not line or line.startswith('#'):
                 continue
-                
-            try:
-                # 编译正则并缓存
-                pattern = re.compile(name)
-                patterns.append(pattern)
-                
-                # 构建标准化名称映射
-                clean_name = self._clean_channel_name(name)
-                name_mappings[clean_name.lower()] = standard_name
-            except re.error as e:
-                logger.warning(f"正则编译跳过: {name} ({str(e)})")
-                
-        return category, patterns, name_mappings
+
+            if line.endswith(',#genre#'):
+                current_category = line.split(',')[0]
+                categories.setdefault(current_category, [])
+                template_order[current_category] = []
+                continue
+
+            if not current_category:
+                continue
+
+            parts = line.split('|')
+            standard_name = parts[0].strip()
+            template_order[current_category].append(standard_name)
+            for name in parts:
+                name = name.strip()
+                if not name:
+                    continue
+                try:
+                    re.compile(name)
+                except re.error as e:
+                    logger.warning(f"正则编译跳过: {name} ({str(e)})")
+                    continue
+                categories[current_category].append(name)
+                standard_names[self._clean_channel_name(name).lower()] = standard_name
+
+        return {
+            'categories': [[category, rules] for category, rules in categories.items() if rules],
+            'standard_names': standard_names,
+            'suffixes': suffixes if suffixes is not None else ["高清", "hd", "综合"],  # 默认后缀
+            'template_order': template_order,
+        }
 
     def batch_match(self, channel_names: List[str]) -> Dict[str, str]:
         """
-        批量匹配分类（优化：并行处理+缓存）
+        批量匹配分类（优化：名称去重+缓存+大批量多进程）
         返回: {channel_name: category}
         """
         if not channel_names:
             return {}
-            
-        # 小批量直接处理
-        if len(channel_names) <= 1000:
-            return {name: self.match(name) for name in channel_names}
         
-        # 并行处理
-        threads = self.config.getint('PERFORMANCE', 'classification_threads', fallback=4)
-        batch_size = self.config.getint('PERFORMANCE', 'classification_batch_size', fallback=1000)
+        # 已缓存的名称直接返回，其余按清理后名称去重
+        results = {}
+        pending: Dict[str, List[str]] = defaultdict(list)  # {clean_name: [channel_name...]}
+        for name in dict.fromkeys(channel_names):
+            cached = self.match_cache.get(name)
+            if cached is not None:
+                results[name] = cached.category
+            else:
+                pending[self._clean_channel_name(name)].append(name)
         
-        logger.debug(f"启动并行分类 | 总数: {len(channel_names)} | 线程: {threads}")
+        if not pending:
+            return results
+        
+        clean_names = list(pending)
+        processes = self.config.getint('PERFORMANCE', 'classification_processes', fallback=0) or os.cpu_count() or 1
+        threshold = self.config.getint('PERFORMANCE', 'process_pool_threshold', fallback=20000)
+        
+        if processes > 1 and len(clean_names) >= threshold:
+            logger.debug(f"启动多进程分类 | 总数: {len(channel_names)} | 去重后: {len(clean_names)} | 进程: {processes}")
+            classified = self._classify_in_processes(clean_names, processes)
+        else:
+            classified = [self._classify_clean(name) for name in clean_names]
+        
+        for clean_name, (category, normalized_name) in zip(clean_names, classified):
+            entry = MatchCache(category, normalized_name)
+            for name in pending[clean_name]:
+                self.match_cache.put(name, entry)
+                self.name_normalization_cache.setdefault(name, normalized_name)
+                results[name] = category
         
-        results = {}
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            futures = {
-                executor.submit(
-                    self._process_batch, 
-                    channel_names[i:i+batch_size]
-                ): i for i in range(0, len(channel_names), batch_size)
-            }
-            
-            for future in as_completed(futures):
-                results.update(future.result())
-                
         return results
 
-    def _process_batch(self, names: List[str]) -> Dict[str, str]:
-        """处理单个批次的分类匹配"""
-        return {name: self.match(name) for name in names}
+    def _classify_in_processes(self, clean_names: List[str], processes: int) -> List[Tuple[str, str]]:
+        """在进程池中分类（每个工作进程只加载一次编译后的模板）"""
+        batch_size = max(1, self.config.getint('PERFORMANCE', 'classification_batch_size', fallback=2000))
+        batches = [clean_names[i:i + batch_size] for i in range(0, len(clean_names), batch_size)]
+        config_data = {
+            section: dict(self.config.items(section, raw=True))
+            for section in self.config.sections()
+        }
+        
+        classified = []
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(batches)),
+            initializer=_init_worker_matcher,
+            initargs=(self.template_path, config_data)
+        ) as executor:
+            # map按提交顺序返回，结果与输入一一对应
+            for batch_result in executor.map(_classify_batch_in_worker, batches):
+                classified.extend(batch_result)
+        return classified
+
+    def _classify_clean(self, clean_name: str) -> Tuple[str, str]:
+        """对清理后的名称执行标准化和模板匹配"""
+        normalized_name = self.normalize_channel_name(clean_name)
+        return self.engine.match(normalized_name) or "未分类", normalized_name
 
     def match(self, channel_name: str) -> str:
         """
@@ -177,28 +360,22 @@ class AutoCategoryMatcher:
         返回: 分类名称
         """
         # 第一级缓存检查
-        if channel_name in self.match_cache:
-            return self.match_cache[channel_name].category
+        cached = self.match_cache.get(channel_name)
+        if cached is not None:
+            return cached.category
             
-        # 清理名称并检查第二级缓存
-        clean_name = self._clean_channel_name(channel_name)
-        normalized_name = self.normalize_channel_name(clean_name)
-        
-        # 第三级缓存：模板匹配
-        for category, patterns in self.categories.items():
-            for pattern in patterns:
-                if pattern.search(normalized_name):
-                    self.match_cache[channel_name] = MatchCache(category, normalized_name)
-                    return category
-                    
-        # 未匹配情况
-        self.match_cache[channel_name] = MatchCache("未分类", normalized_name)
-        return "未分类"
+        # 清理名称并检查第二级缓存，第三级：模板匹配（按模板顺序取第一个命中分类）
+        category, normalized_name = self._classify_clean(self._clean_channel_name(channel_name))
+        self.match_cache.put(channel_name, MatchCache(category, normalized_name))
+        # 清理操作幂等，原始名称的标准化结果与此相同
+        self.name_normalization_cache.setdefault(channel_name, normalized_name)
+        return category
 
     def normalize_channel_name(self, name: str) -> str:
         """标准化频道名称（优化：缓存+后缀处理）"""
-        if name in self.name_normalization_cache:
-            return self.name_normalization_cache[name]
+        cached = self.name_normalization_cache.get(name)
+        if cached is not None:
+            return cached
             
         clean_name = self._clean_channel_name(name)
         
@@ -211,88 +388,138 @@ class AutoCategoryMatcher:
                 normalized_name = normalized_name[:-len(suffix)]
                 break
                 
-        self.name_normalization_cache[name] = normalized_name
+        self.name_normalization_cache.put(name, normalized_name)
         return normalized_name
 
     def sort_channels_by_template(self, 
                                 channels: List[Channel], 
                                 whitelist: Set[str]) -> List[Channel]:
         """
-        按模板顺序排序频道（优化：预构建索引）
-        返回: 排序后的频道列表
+        按模板顺序排序频道（单遍分桶 + 预构建名称序号索引，线性复杂度）
+        返回: 排序后的频道列表（白名单 → 模板分类顺序 → 未分类）
         """
-        # 白名单频道优先
-        whitelist_channels = [
-            c for c in channels 
-            if c.name.lower() in whitelist
-        ]
+        whitelist_channels = []
+        uncategorized = []
+        buckets: Dict[str, List[Channel]] = {category: [] for category in self.template_order}
         
-        # 按模板顺序排序其他频道
-        sorted_channels = []
-        for category in self.template_order:
-            category_channels = [
-                c for c in channels 
-                if c not in whitelist_channels and c.category == category
-            ]
-            sorted_channels.extend(
-                sorted(
-                    category_channels,
-                    key=lambda c: self._get_channel_order(c, self.template_order[category])
-                )
-            )
+        # 单遍分桶（保持原有相对顺序）
+        for channel in channels:
+            if whitelist and channel.name.lower() in whitelist:
+                whitelist_channels.append(channel)
+                continue
+            bucket = buckets.get(channel.category)
+            if bucket is None:
+                uncategorized.append(channel)
+            else:
+                bucket.append(channel)
         
-        # 添加未分类频道
-        uncategorized = [
-            c for c in channels 
-            if c not in whitelist_channels 
-            and c.category not in self.template_order
-        ]
-        sorted_channels.extend(uncategorized)
+        # 分类内按模板序号做稳定计数排序
+        sorted_channels = whitelist_channels
+        for category, bucket in buckets.items():
+            if not bucket:
+                continue
+            ranks = self._get_category_ranks(category)
+            default_rank = len(self.template_order[category])
+            slots: List[List[Channel]] = [[] for _ in range(default_rank + 1)]
+            for channel in bucket:
+                slots[ranks.get(self.normalize_channel_name(channel.name), default_rank)].append(channel)
+            for slot in slots:
+                sorted_channels.extend(slot)
         
-        return whitelist_channels + sorted_channels
-
-    def _get_channel_order(self, 
-                         channel: Channel, 
-                         channel_names: List[str]) -> int:
-        """获取频道在模板中的顺序（优化：缓存索引）"""
-        cache_key = tuple(channel_names)
-        if cache_key not in self.template_order_cache:
-            self.template_order_cache[cache_key] = {
-                name: i for i, name in enumerate(channel_names)
-            }
-            
-        clean_name = self.normalize_channel_name(channel.name)
-        return self.template_order_cache[cache_key].get(clean_name, len(channel_names))
+        sorted_channels.extend(uncategorized)
+        return sorted_channels
 
-    def _load_template_order(self) -> Dict[str, List[str]]:
-        """加载模板中的频道顺序（优化：按需加载）"""
-        template_order = {}
-        current_category = None
-        
+    def _get_category_ranks(self, category: str) -> Dict[str, int]:
+        """获取分类内 {标准名: 模板序号} 索引（按分类缓存）"""
+        ranks = self.template_order_cache.get(category)
+        if ranks is None:
+            ranks = {name: i for i, name in enumerate(self.template_order[category])}
+            self.template_order_cache.put(category, ranks)
+        return ranks
+
+    def _load_result_cache(self) -> None:
+        """加载上次运行的分类结果（模板哈希不一致时丢弃）"""
         try:
-            with open(self.template_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                        
-                    if line.endswith(',#genre#'):
-                        current_category = line.split(',')[0]
-                        template_order[current_category] = []
-                        continue
-                        
-                    if current_category:
-                        parts = line.split('|')
-                        if parts:
-                            template_order[current_category].append(parts[0].strip())
+            with open(self.result_cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return
         except Exception as e:
-            logger.error(f"模板顺序加载失败: {str(e)}")
-            
-        return template_order
+            logger.warning(f"分类结果缓存读取失败: {str(e)}")
+            return
+
+        if cached.get('key') != self.template_hash:
+            logger.info("分类模板已变更，分类结果缓存失效")
+            return
+
+        for name, (category, normalized_name) in cached.get('results', {}).items():
+            self.match_cache.put(name, MatchCache(category, normalized_name))
+            self.name_normalization_cache.put(name, normalized_name)
+        self._result_cache_loaded = len(self.match_cache)
+        logger.info(f"分类结果缓存已加载 | 条目: {self._result_cache_loaded}")
+
+    def save_result_cache(self) -> None:
+        """保存分类结果供下次运行复用"""
+        if not self.result_cache_path:
+            return
+        try:
+            results = {
+                name: [entry.category, entry.normalized_name]
+                for name, entry in self.match_cache.items()
+            }
+            self.result_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.result_cache_path.with_name(self.result_cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': self.template_hash, 'results': results}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.result_cache_path)
+            logger.info(
+                f"分类结果缓存已保存 | 条目: {len(results)} | "
+                f"新增: {max(0, len(results) - self._result_cache_loaded)}"
+            )
+        except Exception as e:
+            logger.warning(f"分类结果缓存写入失败: {str(e)}")
+
+    def cache_stats(self) -> List[Dict]:
+        """各缓存的命中/未命中/淘汰统计（可用于日志或导出）"""
+        return [
+            self.match_cache.stats(),
+            self.name_normalization_cache.stats(),
+            self.template_order_cache.stats(),
+        ]
+
+    def log_cache_stats(self) -> None:
+        """输出缓存统计日志"""
+        for stats in self.cache_stats():
+            logger.info(
+                f"缓存统计 | {stats['name']} | 条目: {stats['size']}/{stats['max_size']} | "
+                f"命中: {stats['hits']} | 未命中: {stats['misses']} | "
+                f"淘汰: {stats['evictions']} | 命中率: {stats['hit_rate']*100:.1f}%"
+            )
 
     def clear_cache(self):
         """清空缓存（用于长时间运行的服务）"""
         self.match_cache.clear()
         self.name_normalization_cache.clear()
         self.template_order_cache.clear()
-        logger.info("分类器缓存已清空")
\ No newline at end of file
+        logger.info("分类器缓存已清空")
+
+
+# ==================== 多进程分类工作函数 ====================
+_worker_matcher: Optional[AutoCategoryMatcher] = None
+
+
+def _init_worker_matcher(template_path: str, config_data: Dict[str, Dict[str, str]]) -> None:
+    """工作进程初始化：加载一次模板（命中模板缓存时为毫秒级）"""
+    global _worker_matcher
+    config = configparser.ConfigParser()
+    config.read_dict(config_data)
+    if not config.has_section('MATCHER'):
+        config.add_section('MATCHER')
+    # 结果缓存由主进程统一维护
+    config.set('MATCHER', 'enable_result_cache', 'false')
+    _worker_matcher = AutoCategoryMatcher(template_path, config)
+
+
+def _classify_batch_in_worker(clean_names: List[str]) -> List[Tuple[str, str]]:
+    """工作进程内分类一个批次，返回 [(分类, 标准名)]"""
+    return [_worker_matcher._classify_clean(name) for name in clean_names]
@@ -1,10 +1,10 @@
 import re
-from typing import ClassVar
+from typing import ClassVar, Optional
 
 class Channel:
     """频道数据模型（内存优化版）"""
     __slots__ = ['name', 'url', 'category', 'original_category', 
-                'status', 'response_time', 'download_speed']
+                'status', 'response_time', 'download_speed', 'url_key', 'reused']
 
     # 类变量（静态变量）定义
     IPV4_PATTERN: ClassVar[re.Pattern] = re.compile(
@@ -22,7 +22,9 @@ class Channel:
                  original_category: str = "未分类",
                  status: str = "pending",
                  response_time: float = 0.0,
-                 download_speed: float = 0.0):
+                 download_speed: float = 0.0,
+                 url_key: Optional[str] = None,
+                 reused: bool = False):
         self.name = name
         self.url = url
         self.category = category
@@ -30,6 +32,8 @@ class Channel:
         self.status = status
         self.response_time = response_time
         self.download_speed = download_speed
+        self.url_key = url_key  # 规范化去重键（解析时计算）
+        self.reused = reused  # 状态复用自测速结果存储，本次未实际测速
 
     @classmethod
     def classify_ip_type(cls, url: str) -> str:
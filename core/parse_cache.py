@@ -0,0 +1,109 @@
+import os
+import time
+import zlib
+import marshal
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 缓存文件格式版本（格式或解析结果语义变化时递增）
+PARSE_CACHE_VERSION = 2
+
+# 频道紧凑元组: (名称, URL, 原始分类, 去重键)
+ChannelTuple = Tuple[str, str, str, Optional[str]]
+
+
+class ParseCache:
+    """解析结果缓存（按源内容哈希+解析配置索引，内容不变的源免解析）
+
+    每个源内容对应一个文件，内容为按列存放的 名称/URL/分类/去重键 列表，
+    经 marshal 序列化后 zlib 压缩。
+    """
+
+    def __init__(self, cache_dir: str, signature: str, max_age_days: float = 7.0):
+        """
+        参数:
+            cache_dir: 缓存目录
+            signature: 解析配置签名（解析器实现/URL参数过滤规则），参与缓存键计算
+            max_age_days: 超过此天数未被使用的缓存文件在 prune() 时删除，0表示不清理
+        """
+        self.cache_dir = Path(cache_dir)
+        self.signature = f"{PARSE_CACHE_VERSION}|{marshal.version}|{signature}".encode('utf-8')
+        self.max_age = max(0.0, max_age_days) * 86400
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, content) -> str:
+        """内容哈希键（blake2b，128位；本地文件源直接哈希映射的原始字节）"""
+        h = hashlib.blake2b(self.signature, digest_size=16)
+        if isinstance(content, str):
+            h.update(content.encode('utf-8', 'surrogatepass'))
+        else:
+            h.update(b'\x00file\x00')
+            content.update_hash(h)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def get(self, key: str) -> Optional[List[ChannelTuple]]:
+        """读取缓存的频道元组，未命中或文件损坏返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                names, urls, categories, keys = marshal.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"解析缓存损坏，已忽略: {path.name} - {str(e)}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        try:
+            # 刷新访问时间，供过期清理判断
+            os.utime(path)
+        except OSError:
+            pass
+        return list(zip(names, urls, categories, keys))
+
+    def put(self, key: str, channels: List[ChannelTuple]) -> None:
+        """写入频道元组（原子替换）"""
+        names = [c[0] for c in channels]
+        urls = [c[1] for c in channels]
+        categories = [c[2] for c in channels]
+        keys = [c[3] for c in channels]
+        data = zlib.compress(marshal.dumps((names, urls, categories, keys)), 1)
+
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"解析缓存写入失败: {str(e)}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def prune(self) -> int:
+        """删除长期未使用的缓存文件，返回删除数量"""
+        if not self.max_age:
+            return 0
+        deadline = time.time() - self.max_age
+        removed = 0
+        for path in self.cache_dir.glob('*.bin'):
+            try:
+                if path.stat().st_mtime < deadline:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
@@ -1,8 +1,15 @@
+import os
 import re
-from typing import Generator, List
+import configparser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Tuple, Union
 import logging
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 from .models import Channel
+from .parse_cache import ParseCache
+from .local_source import LocalSource
+from .canonical import UrlCanonicalizer
 from functools import lru_cache
 
 logger = logging.getLogger(__name__)
@@ -11,6 +18,10 @@ class PlaylistParser:
     """M3U解析器（支持源分类保留）"""
     
     CHANNEL_REGEX = re.compile(r'^(.*?),(http.*)$', re.MULTILINE)
+    # 原生UDP/RTP地址（仅在 [TESTER] native_udp_probe 开启、测速器能够测速时解析）
+    NATIVE_PREFIXES = ('udp://', 'rtp://')
+    NATIVE_TXT_URL_REGEX = re.compile(r',(?=(?:udp|rtp)://)', re.IGNORECASE)
+    NATIVE_CHANNEL_REGEX = re.compile(r'^(.*?),((?:http|(?i:udp|rtp)://).*)$', re.MULTILINE)
     EXTINF_REGEX = re.compile(
         r'#EXTINF:-?[\d.]*,?(.*?)(?:\s+tvg-name="([^"]*)")?(?:\s+tvg-logo="([^"]*)")?(?:\s+group-title="([^"]*)")?.*\n(.*)',
         re.IGNORECASE
@@ -26,8 +37,264 @@ class PlaylistParser:
             params = config.get('URL_FILTER', 'remove_params', fallback='')
             self.params_to_remove = {p.strip() for p in params.split(',') if p.strip()}
 
-    def parse(self, content: str) -> Generator[Channel, None, None]:
-        """解析内容生成频道列表（保留原始分类）"""
+        # 解析引擎: fast(单遍状态机) / legacy(原正则分批解析)
+        self.engine = 'fast'
+        if config:
+            self.engine = config.get('PARSER', 'parser_engine', fallback='fast').strip().lower()
+        if self.engine not in ('fast', 'legacy'):
+            logger.warning(f"未知解析引擎: {self.engine}，使用fast")
+            self.engine = 'fast'
+
+        # 原生UDP/RTP地址：测速器未开启原生测速时无法测速，解析阶段直接忽略
+        self.accept_native = bool(config) and config.getboolean('TESTER', 'native_udp_probe', fallback=False)
+        self.channel_regex = self.NATIVE_CHANNEL_REGEX if self.accept_native else self.CHANNEL_REGEX
+
+        # URL规范化（解析时计算去重键）
+        self.canonicalizer = UrlCanonicalizer.from_config(config)
+
+        # 解析结果缓存
+        self.cache = None
+        if config and config.getboolean('PARSER', 'enable_parse_cache', fallback=False):
+            try:
+                self.cache = ParseCache(
+                    config.get('PARSER', 'parse_cache_dir', fallback='cache/parsed'),
+                    self.signature,
+                    config.getfloat('PARSER', 'parse_cache_max_age', fallback=7.0)
+                )
+            except Exception as e:
+                logger.warning(f"解析缓存初始化失败，已禁用: {str(e)}")
+
+    @property
+    def signature(self) -> str:
+        """解析配置签名（配置变化时解析缓存自动失效）"""
+        canon = self.canonicalizer.signature if self.canonicalizer else ''
+        native = 'native' if self.accept_native else ''
+        return f"{type(self).__name__}|{self.engine}|{','.join(sorted(self.params_to_remove))}|{canon}|{native}"
+
+    def parse_source(self, content: Union[str, LocalSource]) -> List[Channel]:
+        """解析单个源的完整内容（优先使用解析缓存）"""
+        if self.cache is None:
+            return list(self.parse(content))
+
+        key = self.cache.key(content)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return [
+                Channel(name=name, url=url, original_category=category, url_key=url_key)
+                for name, url, category, url_key in cached
+            ]
+
+        channels = list(self.parse(content))
+        self.cache.put(key, [(c.name, c.url, c.original_category, c.url_key) for c in channels])
+        return channels
+
+    def parse_sources(self, contents: List[Union[str, LocalSource]], progress_cb: Optional[Callable] = None) -> List[List[Channel]]:
+        """
+        批量解析多个源（按源顺序返回，失败的源返回空列表）
+        缓存未命中的源较多时分发到进程池，工作进程返回紧凑元组而非Channel对象。
+        """
+        results: List[List[Channel]] = [[] for _ in contents]
+        pending: List[int] = []
+        keys: Dict[int, str] = {}
+        for index, content in enumerate(contents):
+            if self.cache is not None:
+                keys[index] = self.cache.key(content)
+                cached = self.cache.get(keys[index])
+                if cached is not None:
+                    results[index] = [
+                        Channel(name=n, url=u, original_category=c, url_key=k) for n, u, c, k in cached
+                    ]
+                    if progress_cb:
+                        progress_cb()
+                    continue
+            pending.append(index)
+
+        config = self.config or configparser.ConfigParser()
+        processes = config.getint('PERFORMANCE', 'parse_processes', fallback=0) or os.cpu_count() or 1
+        min_bytes = config.getint('PERFORMANCE', 'parse_process_min_bytes', fallback=8 * 1024 * 1024)
+        pending_bytes = sum(len(contents[i]) for i in pending)
+
+        if processes > 1 and len(pending) > 1 and pending_bytes >= min_bytes:
+            logger.debug(f"启动多进程解析 | 源: {len(pending)} | 字符数: {pending_bytes} | 进程: {processes}")
+            parsed = self._parse_in_processes(contents, pending, processes, progress_cb)
+        else:
+            parsed = {}
+            for index in pending:
+                parsed[index] = self._parse_to_columns(contents[index])
+                if progress_cb:
+                    progress_cb()
+
+        for index, columns in parsed.items():
+            if columns is None:
+                continue
+            rows = list(zip(*columns))
+            results[index] = [Channel(name=n, url=u, original_category=c, url_key=k) for n, u, c, k in rows]
+            if self.cache is not None:
+                self.cache.put(keys[index], rows)
+        return results
+
+    def _parse_to_columns(self, content: Union[str, LocalSource]) -> Optional[Tuple[List[str], ...]]:
+        """解析单个源为 (名称列表, URL列表, 分类列表, 去重键列表)，失败返回None"""
+        try:
+            channels = list(self.parse(content))
+        except Exception as e:
+            logger.error(f"解析异常: {str(e)}")
+            return None
+        return (
+            [c.name for c in channels],
+            [c.url for c in channels],
+            [c.original_category for c in channels],
+            [c.url_key for c in channels],
+        )
+
+    def _parse_in_processes(self, contents: List[Union[str, LocalSource]], pending: List[int], processes: int,
+                            progress_cb: Optional[Callable]) -> Dict[int, Optional[Tuple]]:
+        """在进程池中解析（每个源一个任务，单个源失败不影响其它源）"""
+        config_data = {
+            section: dict(self.config.items(section, raw=True))
+            for section in self.config.sections()
+        } if self.config else {}
+
+        parsed: Dict[int, Optional[Tuple]] = {}
+        retry: List[int] = []
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(pending)),
+            initializer=_init_worker_parser,
+            initargs=(config_data,)
+        ) as executor:
+            futures = [(index, executor.submit(_parse_in_worker, contents[index])) for index in pending]
+            # 按提交顺序收集，合并结果与源顺序一致
+            for index, future in futures:
+                try:
+                    parsed[index] = future.result()
+                except BrokenProcessPool:
+                    retry.append(index)
+                    continue
+                except Exception as e:
+                    logger.error(f"解析异常: 第{index + 1}个源 - {str(e)}")
+                    parsed[index] = None
+                if progress_cb:
+                    progress_cb()
+
+        # 工作进程异常退出时进程池整体失效，未完成的源各自在独立进程中重试，定位并隔离出问题的源
+        if retry:
+            logger.warning(f"解析进程异常退出，{len(retry)}个源逐个重试")
+            for index in retry:
+                try:
+                    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker_parser,
+                                             initargs=(config_data,)) as executor:
+                        parsed[index] = executor.submit(_parse_in_worker, contents[index]).result()
+                except Exception as e:
+                    logger.error(f"解析异常: 第{index + 1}个源 - {str(e) or type(e).__name__}")
+                    parsed[index] = None
+                if progress_cb:
+                    progress_cb()
+        return parsed
+
+    def log_cache_stats(self) -> None:
+        """输出解析缓存统计并清理过期缓存"""
+        if self.cache is None:
+            return
+        removed = self.cache.prune()
+        logger.info(f"解析缓存 | 命中: {self.cache.hits} | 未命中: {self.cache.misses} | 清理过期: {removed}")
+
+    def parse(self, content: Union[str, LocalSource]) -> Generator[Channel, None, None]:
+        """解析内容生成频道列表（保留原始分类，content可为字符串或本地文件源）"""
+        if self.engine == 'legacy':
+            if isinstance(content, LocalSource):
+                content = content.read_text()
+            channels = self.parse_legacy(content)
+        elif isinstance(content, LocalSource):
+            channels = self._parse_lines(content.iter_lines())
+        else:
+            channels = self.parse_fast(content)
+        if self.canonicalizer is None:
+            return channels
+        return self._with_url_keys(channels)
+
+    def _with_url_keys(self, channels: Iterable[Channel]) -> Generator[Channel, None, None]:
+        """为频道计算规范化去重键"""
+        key = self.canonicalizer.key
+        for channel in channels:
+            channel.url_key = key(channel.url)
+            yield channel
+
+    def parse_fast(self, content: str) -> Generator[Channel, None, None]:
+        """
+        单遍线性状态机解析（M3U/TXT通用）
+        逐行用 str.startswith/find 判断行类型，不使用回溯正则；
+        状态仅有“当前分类”和“待配对的EXTINF行”，不分批，因此批次边界上的频道不会丢失。
+        """
+        return self._parse_lines(content.splitlines())
+
+    def _parse_lines(self, lines: Iterable[str]) -> Generator[Channel, None, None]:
+        """状态机主循环（输入为逐行文本，不要求整个源已在内存中）"""
+        clean_url = self._clean_url_fast
+        accept_native = self.accept_native
+        native_prefixes = self.NATIVE_PREFIXES
+        find_native_url = self.NATIVE_TXT_URL_REGEX.search
+        category = None
+        extinf = None
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line[0] == '#':
+                if line.startswith('#EXTINF'):
+                    extinf = line
+                    group_title = self._find_group_title(line)
+                    if group_title:
+                        category = group_title
+                    continue
+            elif extinf is not None and (
+                line.startswith('http') or accept_native and line[:6].lower() in native_prefixes
+            ):
+                # EXTINF + URL 组合，名称取EXTINF行最后一个逗号之后的部分
+                yield Channel(
+                    name=extinf.rsplit(',', 1)[-1].strip(),
+                    url=clean_url(line),
+                    original_category=category or "未分类"
+                )
+                extinf = None
+                continue
+
+            # TXT格式: 名称,URL（绝大多数为http地址，先用find判断，原生UDP/RTP地址再用正则）
+            pos = line.find(',http')
+            if pos < 0 and accept_native and (match := find_native_url(line)):
+                pos = match.start()
+            if pos >= 0:
+                yield Channel(
+                    name=line[:pos].rsplit(',', 1)[-1].strip(),
+                    url=clean_url(line[pos + 1:]),
+                    original_category=category or "未分类"
+                )
+
+    @staticmethod
+    def _find_group_title(line: str) -> str:
+        """提取第一个非空的group-title属性值"""
+        start = 0
+        while True:
+            pos = line.find('group-title="', start)
+            if pos < 0:
+                return ''
+            pos += 13
+            end = line.find('"', pos)
+            if end < 0:
+                return ''
+            if end > pos:
+                return line[pos:end]
+            start = pos
+
+    def _clean_url_fast(self, raw_url: str) -> str:
+        """清理URL（不含查询参数时跳过urlparse）"""
+        url = raw_url.split('$', 1)[0].strip()
+        if not self.params_to_remove or '?' not in url:
+            return url
+        return self._clean_url(url)
+
+    def parse_legacy(self, content: str) -> Generator[Channel, None, None]:
+        """原分批正则解析（保留用于对照）"""
         lines = content.splitlines()
         batch_size = min(1000, len(lines) // 10 or 100)
         
@@ -56,7 +323,9 @@ class PlaylistParser:
                 elif match := self.EXTINF_REGEX.match(line):
                     if match.group(4):  # group-title from EXTINF_REGEX
                         current_category = match.group(4)
-            elif current_extinf and line.startswith('http'):
+            elif current_extinf and (
+                line.startswith('http') or self.accept_native and line[:6].lower() in self.NATIVE_PREFIXES
+            ):
                 # 处理完整的EXTINF + URL组合
                 if match := self.EXTINF_REGEX.match(current_extinf):
                     name = match.group(2) or match.group(1)  # 优先使用tvg-name
@@ -78,7 +347,7 @@ class PlaylistParser:
                     ))
                 current_extinf = None
             else:
-                if match := self.CHANNEL_REGEX.match(line):
+                if match := self.channel_regex.match(line):
                     channel_matches.append((match.group(1), match.group(2), current_category, None))
                 elif match := self.EXTINF_REGEX.match(line):
                     name = match.group(2) or match.group(1)
@@ -125,4 +394,23 @@ class PlaylistParser:
             except Exception as e:
                 logger.warning(f"URL参数处理失败: {url}, 错误: {str(e)}")
         
-        return url
\ No newline at end of file
+        return url
+
+# ==================== 多进程解析工作函数 ====================
+_worker_parser: Optional[PlaylistParser] = None
+
+
+def _init_worker_parser(config_data: Dict[str, Dict[str, str]]) -> None:
+    """工作进程初始化：创建解析器（解析缓存由主进程统一维护）"""
+    global _worker_parser
+    config = configparser.ConfigParser()
+    config.read_dict(config_data)
+    if not config.has_section('PARSER'):
+        config.add_section('PARSER')
+    config.set('PARSER', 'enable_parse_cache', 'false')
+    _worker_parser = PlaylistParser(config)
+
+
+def _parse_in_worker(content: Union[str, LocalSource]) -> Optional[Tuple[List[str], ...]]:
+    """工作进程内解析一个源，返回按列存放的紧凑元组"""
+    return _worker_parser._parse_to_columns(content)
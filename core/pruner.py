@@ -0,0 +1,90 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from .models import Channel
+from .history import HistoryIndex, extract_host
+
+logger = logging.getLogger(__name__)
+
+# 被裁剪（未测速）频道的状态
+PRUNED_STATUS = 'pruned'
+
+
+class SourcePruner:
+    """测速前按频道限制候选源数量
+
+    按 (分类, 标准名) 分组，每组只保留得分最高的N个URL进入测速。
+    得分由廉价信号加权得到：URL历史在线率、主机历史在线率、协议优先级。
+    没有历史记录的URL/主机使用先验值，因此新源不会被一律排到最后。
+    """
+
+    def __init__(self, config, history: Optional[HistoryIndex] = None):
+        self.max_sources = config.getint('PRUNER', 'max_sources_per_channel', fallback=0)
+        self.url_weight = config.getfloat('PRUNER', 'url_history_weight', fallback=3.0)
+        self.host_weight = config.getfloat('PRUNER', 'host_history_weight', fallback=2.0)
+        self.protocol_weight = config.getfloat('PRUNER', 'protocol_weight', fallback=1.0)
+        self.prior = config.getfloat('PRUNER', 'unknown_prior', fallback=0.5)
+        protocols = [
+            p.strip().lower() for p in
+            config.get('PRUNER', 'protocol_priority', fallback='https,http,rtmp,rtsp').split(',') if p.strip()
+        ]
+        # 排名越靠前得分越高，未列出的协议得0分
+        self.protocol_scores: Dict[str, float] = {
+            proto: (len(protocols) - i) / len(protocols) for i, proto in enumerate(protocols)
+        }
+        self.history = history or HistoryIndex()
+
+    @classmethod
+    def from_config(cls, config, history: Optional[HistoryIndex] = None) -> Optional["SourcePruner"]:
+        """按配置创建（未启用或上限<=0时返回None；未传入历史索引时按配置加载）"""
+        if not config.getboolean('PRUNER', 'enable_source_cap', fallback=False):
+            return None
+        if config.getint('PRUNER', 'max_sources_per_channel', fallback=0) <= 0:
+            return None
+        return cls(config, history if history is not None else HistoryIndex.from_config(config))
+
+    def score(self, channel: Channel) -> float:
+        """候选源得分（越高越优先测速）"""
+        url = channel.url
+        url_rel = self.history.url_reliability(url)
+        host_rel = self.history.host_reliability(extract_host(url))
+        scheme = url.partition('://')[0].lower()
+        return (
+            self.url_weight * (self.prior if url_rel is None else url_rel)
+            + self.host_weight * (self.prior if host_rel is None else host_rel)
+            + self.protocol_weight * self.protocol_scores.get(scheme, 0.0)
+        )
+
+    def prune(self, channels: List[Channel], whitelist: Set[str]) -> Tuple[List[Channel], List[Channel]]:
+        """
+        裁剪候选源（白名单频道不受限制也不占名额）
+        返回: (保留待测速的频道, 被裁剪的频道)
+              频道组之间保持输入顺序，组内按得分从高到低排列（即测速优先级）
+        """
+        groups: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for i, channel in enumerate(channels):
+            if whitelist and channel.name.lower() in whitelist:
+                continue
+            groups[(channel.category, channel.name)].append(i)
+
+        # 组内按得分重排（同分时保持原顺序），超出上限的标记为裁剪
+        order = list(range(len(channels)))
+        dropped: Set[int] = set()
+        for indices in groups.values():
+            if len(indices) == 1:
+                continue
+            ranked = sorted(indices, key=lambda i: -self.score(channels[i]))
+            dropped.update(ranked[self.max_sources:])
+            # 组内位置不变，依次填入得分从高到低的频道
+            for slot, i in zip(indices, ranked):
+                order[slot] = i
+
+        kept, pruned = [], []
+        for i in order:
+            channel = channels[i]
+            if i in dropped:
+                channel.status = PRUNED_STATUS
+                pruned.append(channel)
+            else:
+                kept.append(channel)
+        return kept, pruned
@@ -0,0 +1,108 @@
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SQLite单条语句的参数个数上限较低（旧版本为999），批量查询时分段
+_QUERY_CHUNK = 500
+
+
+class ProbeResultStore:
+    """测速结果持久化存储（SQLite，按规范化URL键保存最近一次结果）
+
+    在线与离线结果分别设置有效期：在TTL内的URL直接复用上次结果，不再发起测速。
+    """
+
+    def __init__(self, path: str, online_ttl: float = 6 * 3600, offline_ttl: float = 3600):
+        """
+        参数:
+            path: 数据库文件路径
+            online_ttl: 在线结果有效期（秒）
+            offline_ttl: 离线结果有效期（秒）
+        """
+        self.path = Path(path)
+        self.online_ttl = max(0.0, online_ttl)
+        self.offline_ttl = max(0.0, offline_ttl)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS probe_results ('
+            ' url_key TEXT PRIMARY KEY,'
+            ' status TEXT NOT NULL,'
+            ' speed REAL NOT NULL,'
+            ' latency REAL NOT NULL,'
+            ' tested_at REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config):
+        """按配置创建，未启用时返回None"""
+        if not config.getboolean('TESTER', 'enable_result_store', fallback=False):
+            return None
+        try:
+            return cls(
+                config.get('TESTER', 'result_store_path', fallback='cache/probe_results.sqlite'),
+                config.getfloat('TESTER', 'online_result_ttl', fallback=6 * 3600),
+                config.getfloat('TESTER', 'offline_result_ttl', fallback=3600),
+            )
+        except Exception as e:
+            logger.warning(f"测速结果存储初始化失败，已禁用: {str(e)}")
+            return None
+
+    def lookup_fresh(self, keys: Iterable[str]) -> Dict[str, Tuple[str, float, float]]:
+        """
+        查询仍在有效期内的结果
+        返回: {url_key: (status, speed, latency)}
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        fresh = {}
+        for i in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[i:i + _QUERY_CHUNK]
+            rows = self._conn.execute(
+                f'SELECT url_key, status, speed, latency, tested_at FROM probe_results '
+                f'WHERE url_key IN ({",".join("?" * len(chunk))})',
+                chunk
+            )
+            for key, status, speed, latency, tested_at in rows:
+                ttl = self.online_ttl if status == 'online' else self.offline_ttl
+                if now - tested_at < ttl:
+                    fresh[key] = (status, speed, latency)
+        return fresh
+
+    def save(self, results: Iterable[Tuple[str, str, float, float]]) -> int:
+        """
+        批量写入测速结果（覆盖旧结果）
+        参数: [(url_key, status, speed, latency)]
+        """
+        now = time.time()
+        rows: List[Tuple] = [(key, status, speed, latency, now) for key, status, speed, latency in results]
+        if not rows:
+            return 0
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO probe_results (url_key, status, speed, latency, tested_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def purge_expired(self) -> int:
+        """删除已超过两种有效期的记录"""
+        deadline = time.time() - max(self.online_ttl, self.offline_ttl)
+        with self._conn:
+            cursor = self._conn.execute('DELETE FROM probe_results WHERE tested_at < ?', (deadline,))
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM probe_results').fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
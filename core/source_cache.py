@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SourceCache:
+    """
+    订阅源HTTP缓存（保存响应体及ETag/Last-Modified，支持条件请求）
+    缓存按订阅源（主URL）保存；由镜像返回的内容同样存在主URL下，并记录实际来源地址，
+    校验头只对该来源地址有效。
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = 0.0):
+        """
+        参数:
+            cache_dir: 缓存目录
+            ttl: 无校验头（ETag/Last-Modified）的源在此秒数内直接使用缓存，0表示不启用
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = max(0.0, ttl)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """读取缓存元数据（缓存不完整时返回None）"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"源缓存元数据损坏: {url} - {str(e)}")
+            return None
+        if meta.get('url') != url or not body_path.exists():
+            return None
+        return meta
+
+    def iter_body(self, url: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """分块读取缓存的响应体"""
+        _, body_path = self._paths(url)
+        with open(body_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def is_fresh(self, meta: Dict) -> bool:
+        """无校验头的源在TTL内视为新鲜，可免请求直接使用"""
+        if not self.ttl or meta.get('etag') or meta.get('last_modified'):
+            return False
+        return time.time() - meta.get('fetched_at', 0) < self.ttl
+
+    @staticmethod
+    def conditional_headers(meta: Optional[Dict], url: Optional[str] = None) -> Dict[str, str]:
+        """根据缓存元数据生成条件请求头（url 不是缓存内容的实际来源地址时不发送校验头）"""
+        headers = {}
+        if not meta:
+            return headers
+        if url is not None and meta.get('fetched_from', meta.get('url')) != url:
+            return headers
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def open_writer(self, url: str, fetched_from: Optional[str] = None) -> "_BodyWriter":
+        """
+        打开流式写入器（边下载边写临时文件，提交时才替换缓存）
+        url: 订阅源（主URL）；fetched_from: 实际请求的地址（镜像），默认与url相同
+        """
+        meta_path, body_path = self._paths(url)
+        return _BodyWriter(url, meta_path, body_path, fetched_from or url)
+
+    def touch(self, url: str, meta: Dict) -> None:
+        """304响应后刷新获取时间"""
+        meta_path, _ = self._paths(url)
+        meta = dict(meta, fetched_at=time.time())
+        try:
+            self._atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"源缓存更新失败: {url} - {str(e)}")
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class _BodyWriter:
+    """缓存响应体流式写入器"""
+
+    def __init__(self, url: str, meta_path: Path, body_path: Path, fetched_from: str):
+        self.url = url
+        self.fetched_from = fetched_from
+        self.meta_path = meta_path
+        self.body_path = body_path
+        # 同一URL可能被并发请求，临时文件名需唯一
+        self.tmp_path = body_path.with_name(f"{body_path.name}.{os.getpid()}.{id(self)}.tmp")
+        self.size = 0
+        self._file = open(self.tmp_path, 'wb')
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self, headers) -> None:
+        """完成200响应写入（先替换响应体再写元数据，保证元数据存在时响应体完整）"""
+        try:
+            self._file.close()
+            os.replace(self.tmp_path, self.body_path)
+            meta = {
+                'url': self.url,
+                'fetched_from': self.fetched_from,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'content_type': headers.get('Content-Type', ''),
+                'size': self.size,
+                'fetched_at': time.time(),
+            }
+            SourceCache._atomic_write(self.meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"源缓存写入失败: {self.url} - {str(e)}")
+
+    def abort(self) -> None:
+        """放弃写入（下载失败/超限）"""
+        try:
+            self._file.close()
+            self.tmp_path.unlink()
+        except OSError:
+            pass
@@ -8,9 +8,19 @@ from collections import defaultdict
 from urllib.parse import urlparse
 from configparser import ConfigParser
 from .models import Channel
+from .result_store import ProbeResultStore
+from .history import HistoryIndex
+from .hls import is_playlist, parse_playlist
+from .udp_probe import UdpProbe, UdpProbeResult
 
 logger = logging.getLogger(__name__)
 
+# 支持的测速方式
+PROBE_MODES = ('head_get', 'single_get', 'hls')
+
+# HLS播放列表读取上限
+_MAX_PLAYLIST_SIZE = 512 * 1024
+
 class SpeedTester:
     """高性能流媒体测速引擎（完整优化版）"""
 
@@ -20,7 +30,8 @@ class SpeedTester:
                  max_attempts: int = 3,
                  min_download_speed: float = 100.0, 
                  enable_logging: bool = True,
-                 config: Optional[ConfigParser] = None):
+                 config: Optional[ConfigParser] = None,
+                 history: Optional[HistoryIndex] = None):
         """
         初始化测速器
         
@@ -31,6 +42,7 @@ class SpeedTester:
             min_download_speed: HTTP最低速度要求(KB/s)
             enable_logging: 是否启用日志
             config: 配置对象
+            history: 历史测速索引（用于测速排序和长期失效源的短超时）
         """
         # 基础配置
         self.timeout = timeout
@@ -61,6 +73,25 @@ class SpeedTester:
         self.max_http_latency = self.config.getint('TESTER', 'max_http_latency', fallback=1000)
         self.max_channels_per_ip = self.config.getint('TESTER', 'max_channels_per_ip', fallback=100)
         
+        # 测速方式：head_get 先HEAD测延迟再GET测速；single_get 单次流式GET同时测首字节延迟和速度；
+        # hls 在single_get基础上对播放列表继续下载一个媒体分片测速
+        self.probe_mode = self.config.get('TESTER', 'probe_mode', fallback='head_get').strip().lower()
+        if self.probe_mode not in PROBE_MODES:
+            self.log.warning("未知测速方式: %s，使用head_get", self.probe_mode)
+            self.probe_mode = 'head_get'
+        self.hls_min_realtime = self.config.getfloat('TESTER', 'hls_min_realtime', fallback=1.0)
+        self.hls_realtime: Dict[str, float] = {}  # URL -> 分片下载速度/播放所需码率
+        
+        # 原生UDP/RTP测速（udp:// rtp:// 地址直接收数据报，不经过HTTP）
+        self.udp_probe: Optional[UdpProbe] = None
+        if self.config.getboolean('TESTER', 'native_udp_probe', fallback=False):
+            self.udp_probe = UdpProbe(
+                self.config.get('TESTER', 'udp_interface', fallback='').strip(),
+                self.config.getfloat('TESTER', 'udp_sample_window', fallback=1.0)
+            )
+        self.udp_require_ts = self.config.getboolean('TESTER', 'udp_require_ts', fallback=True)
+        self.udp_results: Dict[str, UdpProbeResult] = {}
+        
         # IP防护机制
         self.failed_ips: Dict[str, int] = defaultdict(int)
         self.max_failures_per_ip = self.config.getint('PROTECTION', 'max_failures_per_ip', fallback=5)
@@ -71,8 +102,30 @@ class SpeedTester:
         # 并发控制
         self.semaphore = asyncio.BoundedSemaphore(self.concurrency)
         
+        # 提前终止：每个频道在线源达到该数量后跳过/取消其余候选（0表示不启用）
+        self.enough_online = self.config.getint('TESTER', 'enough_online_per_channel', fallback=0)
+        self._online_by_channel: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._probes_by_channel: Dict[Tuple[str, str], Set[asyncio.Task]] = defaultdict(set)
+        self._early_cancelled: Set[asyncio.Task] = set()
+        
+        # 历史驱动：按在线可能性排序，长期失效的源使用更短超时；截止时间后不再发起新测速
+        self.history = history if history is not None else HistoryIndex()
+        self.history_ordering = self.config.getboolean('TESTER', 'enable_history_ordering', fallback=False)
+        self.dead_source_timeout = self.config.getfloat('TESTER', 'dead_source_timeout', fallback=2.0)
+        self.dead_min_tests = self.config.getint('TESTER', 'dead_min_tests', fallback=3)
+        self.test_deadline = self.config.getfloat('TESTER', 'test_deadline', fallback=0)
+        self._deadline_at: Optional[float] = None
+        self.deadline_skipped = 0
+        
+        # 测速结果持久化（有效期内的URL复用上次结果）
+        self.result_store = ProbeResultStore.from_config(self.config)
+        if self.result_store is not None:
+            self.result_store.purge_expired()
+        self.reused_count = 0
+        
         # 统计
         self.success_count = 0
+        self.skipped_count = 0
         self.total_count = 0
         self.start_time = 0.0
 
@@ -109,19 +162,34 @@ class SpeedTester:
         批量测试频道（安全版本）
         
         参数:
-            channels: 频道列表
+            channels: 频道列表（按 prioritize() 排好的测速顺序传入，分批调用时应对全部频道排序一次后再分批）
             progress_cb: 进度回调函数
             failed_urls: 存储失败URL的集合
             white_list: 白名单集合
         """
-        failed_urls = failed_urls or set()
+        # 调用方传入的空集合也要原地填充
+        failed_urls = failed_urls if failed_urls is not None else set()
         white_list = white_list or set()
         progress_cb = progress_cb or (lambda _: None)
         
         self.total_count = len(channels)
         self.success_count = 0
+        self.skipped_count = 0
         self.start_time = time.time()
-        
+        if self.test_deadline > 0 and self._deadline_at is None:
+            # 截止时间从第一次测速开始计算，对后续分批调用同样有效
+            self._deadline_at = time.monotonic() + self.test_deadline
+        if self.result_store is not None:
+            channels = self._apply_stored_results(channels, progress_cb, failed_urls, white_list)
+            if not channels:
+                return
+        if self._past_deadline():
+            # 截止时间已过的分批调用直接标记跳过，不再建立连接
+            for channel in channels:
+                self._handle_deadline(channel)
+            progress_cb(len(channels))
+            return
+
         self.log.info(
             "▶️ 开始测速 | 总数: %d | 并发: %d | 单IP最大频道: %d | 最大下载量: %dKB",
             self.total_count, self.concurrency, self.max_channels_per_ip,
@@ -174,17 +242,148 @@ class SpeedTester:
                 raise
         finally:
             await connector.close()
+            if self.result_store is not None:
+                self._save_results(channels, white_list)
         
         elapsed = time.time() - self.start_time
         success_rate = (self.success_count / self.total_count) * 100 if self.total_count > 0 else 0
         self.log.info(
-            "✅ 测速完成 | 成功: %d(%.1f%%) | 失败: %d | 屏蔽IP: %d | 用时: %.1fs",
+            "✅ 测速完成 | 成功: %d(%.1f%%) | 失败: %d | 跳过: %d | 屏蔽IP: %d | 用时: %.1fs",
             self.success_count, success_rate,
-            self.total_count - self.success_count,
+            self.total_count - self.success_count - self.skipped_count,
+            self.skipped_count,
             len(self.blocked_ips),
             elapsed
         )
 
+    @staticmethod
+    def _result_key(channel: Channel) -> str:
+        return channel.url_key or channel.url
+
+    def _apply_stored_results(self,
+                              channels: List[Channel],
+                              progress_cb: Callable,
+                              failed_urls: Set[str],
+                              white_list: Set[str]) -> List[Channel]:
+        """复用有效期内的测速结果，返回仍需测速的频道"""
+        candidates = [ch for ch in channels if not self._is_in_white_list(ch, white_list)]
+        try:
+            fresh = self.result_store.lookup_fresh(self._result_key(ch) for ch in candidates)
+        except Exception as e:
+            self.log.warning("测速结果存储读取失败: %s", str(e))
+            return channels
+        if not fresh:
+            return channels
+
+        remaining = []
+        reused = 0
+        for channel in channels:
+            result = fresh.get(self._result_key(channel))
+            if result is None or self._is_in_white_list(channel, white_list):
+                remaining.append(channel)
+                continue
+            channel.status, channel.download_speed, channel.response_time = result
+            channel.reused = True
+            reused += 1
+            if channel.status == 'online':
+                self.success_count += 1
+                if self.enough_online > 0:
+                    self._online_by_channel[self._channel_key(channel)] += 1
+            else:
+                failed_urls.add(channel.url)
+
+        self.reused_count += reused
+        progress_cb(reused)
+        self.log.info("♻️ 复用历史测速结果: %d | 需测速: %d", reused, len(remaining))
+        return remaining
+
+    def _save_results(self, channels: List[Channel], white_list: Set[str]) -> None:
+        """保存本次实际测速的结果（跳过/白名单/未测试的频道不保存）"""
+        try:
+            self.result_store.save(
+                (self._result_key(ch), ch.status, ch.download_speed, ch.response_time)
+                for ch in channels
+                if ch.status in ('online', 'offline') and not self._is_in_white_list(ch, white_list)
+            )
+        except Exception as e:
+            self.log.warning("测速结果存储写入失败: %s", str(e))
+
+    @staticmethod
+    def _channel_key(channel: Channel) -> Tuple[str, str]:
+        return channel.category, channel.name
+
+    def prioritize(self, channels: List[Channel]) -> List[Channel]:
+        """
+        测速顺序：启用历史排序时按在线可能性（其次历史速度中位数）从高到低稳定排序，
+        启用提前终止时再按组内名次轮转
+        """
+        if self.history_ordering and self.history:
+            history = self.history
+            channels = sorted(
+                channels,
+                key=lambda ch: (-history.likelihood(ch.url), -history.median_speed(ch.url))
+            )
+        if self.enough_online > 0:
+            channels = self.order_by_rank(channels)
+        return channels
+
+    @property
+    def _priority_ordering(self) -> bool:
+        """prioritize() 是否会调整测速顺序"""
+        return bool(self.history_ordering and self.history) or self.enough_online > 0
+
+    def _timeout_for(self, url: str, is_udp: bool) -> float:
+        """单次测速超时（启用历史排序时，历史上长期失效的源使用更短超时）"""
+        timeout_val = self.udp_timeout if is_udp else self.http_timeout
+        if self.history_ordering and self.history and self.history.is_chronically_dead(url, self.dead_min_tests):
+            timeout_val = min(timeout_val, self.dead_source_timeout)
+        return timeout_val
+
+    def _past_deadline(self) -> bool:
+        return self._deadline_at is not None and time.monotonic() >= self._deadline_at
+
+    def order_by_rank(self, channels: List[Channel]) -> List[Channel]:
+        """
+        按组内名次轮转排序：先测所有频道的第1候选，再测第2候选……
+        输入中同一频道的候选顺序即优先级（见SourcePruner），
+        使每个频道最可能在线的源最先得到结果，靠后的候选更可能被跳过。
+        """
+        rank: Dict[Tuple[str, str], int] = defaultdict(int)
+        ranked = []
+        for position, channel in enumerate(channels):
+            key = self._channel_key(channel)
+            ranked.append((rank[key], position, channel))
+            rank[key] += 1
+        ranked.sort(key=lambda item: (item[0], item[1]))
+        return [channel for _, _, channel in ranked]
+
+    def _has_enough(self, channel: Channel) -> bool:
+        return self.enough_online > 0 and self._online_by_channel[self._channel_key(channel)] >= self.enough_online
+
+    def _handle_deadline(self, channel: Channel) -> None:
+        """已到测速截止时间，跳过"""
+        self.deadline_skipped += 1
+        self._handle_skipped(channel, "已到测速截止时间")
+
+    def _handle_skipped(self, channel: Channel, reason: str = "已有足够在线源") -> None:
+        """未测速跳过（与离线区分）"""
+        channel.status = 'skipped'
+        self.skipped_count += 1
+        self.log.debug("⏭️ %s，跳过 %s | %s", reason, channel.name, self._simplify_url(channel.url))
+
+    def _record_online(self, channel: Channel, current: Optional[asyncio.Task]) -> None:
+        """记录在线结果，达到阈值时取消该频道其余在途测速"""
+        if self.enough_online <= 0:
+            return
+        key = self._channel_key(channel)
+        self._online_by_channel[key] += 1
+        if self._online_by_channel[key] < self.enough_online:
+            return
+        for task in self._probes_by_channel.pop(key, ()):
+            if task is not current and not task.done():
+                self._early_cancelled.add(task)
+                task.cancel()
+
     async def _safe_gather(self, tasks):
         """安全执行gather操作"""
         try:
@@ -205,10 +404,13 @@ class SpeedTester:
                             white_list: Set[str]) -> Dict[str, List[Channel]]:
         """
         改进版IP分组逻辑
-        返回: { "ip_0": [ch1,ch2...], "ip_1": [...] }
+        启用测速排序时，按测速顺序每 concurrency 个频道划为一档，同一IP在不同档位分属不同分组，
+        分组按其首个频道的顺序排列，避免靠后的频道随同IP靠前的频道一起提前测速。
+        返回: { "ip_0": [ch1,ch2...], "ip_1": [...] }（分档时为 "ip_档位_序号"）
         """
         groups = defaultdict(list)
         ip_counter = defaultdict(int)
+        tier_size = self.concurrency if self._priority_ordering else 0
         
         # 白名单独立分组
         whitelist_group = [ch for ch in channels if self._is_in_white_list(ch, white_list)]
@@ -216,11 +418,13 @@ class SpeedTester:
             groups["whitelist"] = whitelist_group
         
         # 常规分组
-        for ch in channels:
+        for position, ch in enumerate(channels):
             if self._is_in_white_list(ch, white_list):
                 continue
                 
             ip = self._extract_ip_from_url(ch.url)
+            if tier_size:
+                ip = f"{ip}_{position // tier_size}"
             group_idx = ip_counter[ip] // self.max_channels_per_ip
             group_key = f"{ip}_{group_idx}"
             
@@ -291,20 +495,50 @@ class SpeedTester:
             progress_cb(1)
             return
 
+        if self._has_enough(channel):
+            self._handle_skipped(channel)
+            progress_cb(1)
+            return
+
         async with self.semaphore:
+            # 等待并发名额期间可能已凑够在线源或已到截止时间
+            if self._has_enough(channel):
+                self._handle_skipped(channel)
+                progress_cb(1)
+                return
+            if self._past_deadline():
+                self._handle_deadline(channel)
+                progress_cb(1)
+                return
+
+            probe = asyncio.ensure_future(self._unified_test(session, channel))
+            key = self._channel_key(channel)
+            if self.enough_online > 0:
+                self._probes_by_channel[key].add(probe)
             try:
                 self.log.debug("🔍 开始测试 %s", channel.name)
 
-                success, speed, latency = await self._unified_test(session, channel)
+                success, speed, latency = await probe
                 
                 if success:
                     self._handle_success(channel, speed, latency)
+                    self._record_online(channel, probe)
                 else:
                     self._handle_failure(channel, failed_urls, speed, latency)
                     
+            except asyncio.CancelledError:
+                if probe not in self._early_cancelled:
+                    raise
+                # 同频道已凑够在线源，被主动取消
+                self._early_cancelled.discard(probe)
+                self._handle_skipped(channel)
             except Exception as e:
                 self._handle_error(channel, failed_urls, e)
             finally:
+                if self.enough_online > 0:
+                    probes = self._probes_by_channel.get(key)
+                    if probes is not None:
+                        probes.discard(probe)
                 progress_cb(1)
 
     async def _unified_test(self,
@@ -314,35 +548,20 @@ class SpeedTester:
         try:
             headers = {'User-Agent': 'Mozilla/5.0'}
             is_udp = self._is_udp_url(channel.url)
-            timeout_val = self.udp_timeout if is_udp else self.http_timeout
+            timeout_val = self._timeout_for(channel.url, is_udp)
             timeout = aiohttp.ClientTimeout(total=timeout_val)
             
             # 协议阈值
             min_speed = self.min_udp_download_speed if is_udp else self.min_download_speed
             max_latency = self.max_udp_latency if is_udp else self.max_http_latency
 
-            # 阶段1：快速HEAD请求测延迟
-            latency_start = time.perf_counter()
-            async with session.head(channel.url, headers=headers, timeout=timeout) as resp:
-                latency = (time.perf_counter() - latency_start) * 1000
-                if latency > max_latency or resp.status != 200:
-                    return False, 0.0, latency
-
-            # 阶段2：GET请求测速度（复用连接）
-            start = time.perf_counter()
-            content_size = 0
-            
-            # 使用iter_chunked分块读取，避免一次性加载大文件
-            async with session.get(channel.url, headers=headers, timeout=timeout) as resp:
-                async for chunk in resp.content.iter_chunked(1024 * 4):  # 4KB chunks
-                    content_size += len(chunk)
-                    # 达到最大下载量时提前结束
-                    if content_size >= self.max_download_size:
-                        break
-                
-                duration = time.perf_counter() - start
-                speed = content_size / duration / 1024 if duration > 0 else 0
-                return speed >= min_speed, speed, latency
+            if self.udp_probe is not None and UdpProbe.is_native(channel.url):
+                return await self._probe_udp(channel.url, timeout_val, min_speed, max_latency)
+            if self.probe_mode == 'hls':
+                return await self._probe_hls(session, channel.url, headers, timeout, min_speed, max_latency)
+            if self.probe_mode == 'single_get':
+                return await self._probe_single_get(session, channel.url, headers, timeout, min_speed, max_latency)
+            return await self._probe_head_get(session, channel.url, headers, timeout, min_speed, max_latency)
 
         except asyncio.TimeoutError:
             return False, 0.0, 0.0
@@ -352,6 +571,193 @@ class SpeedTester:
             self.log.error("测试错误 %s: %s", channel.url, str(e)[:100])
             return False, 0.0, 0.0
 
+    async def _probe_udp(self,
+                         url: str,
+                         timeout: float,
+                         min_speed: float,
+                         max_latency: float) -> Tuple[bool, float, float]:
+        """原生UDP/RTP测速：首个数据报到达时间作为延迟，采样窗口内的负载速度作为速度"""
+        result = await self.udp_probe.probe(url, timeout)
+        self.udp_results[url] = result
+        if not result.packets:
+            return False, 0.0, 0.0
+
+        latency = result.first_packet_ms
+        speed = result.speed
+        self.log.debug("📡 UDP %d包 | %.0f包/s | %.1fKB/s | 首包 %.0fms | TS %d/%d | %s",
+                       result.packets, result.packet_rate, speed, latency,
+                       result.ts_valid, result.ts_checked, self._simplify_url(url))
+        ok = latency <= max_latency and speed >= min_speed and (result.is_ts or not self.udp_require_ts)
+        return ok, speed, latency
+
+    async def _probe_head_get(self,
+                              session: aiohttp.ClientSession,
+                              url: str,
+                              headers: Dict[str, str],
+                              timeout: aiohttp.ClientTimeout,
+                              min_speed: float,
+                              max_latency: float) -> Tuple[bool, float, float]:
+        """HEAD请求测延迟，再GET请求测速度"""
+        # 阶段1：快速HEAD请求测延迟
+        latency_start = time.perf_counter()
+        async with session.head(url, headers=headers, timeout=timeout) as resp:
+            latency = (time.perf_counter() - latency_start) * 1000
+            if latency > max_latency or resp.status != 200:
+                return False, 0.0, latency
+
+        # 阶段2：GET请求测速度（复用连接）
+        start = time.perf_counter()
+        content_size = 0
+        
+        # 使用iter_chunked分块读取，避免一次性加载大文件
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            async for chunk in resp.content.iter_chunked(1024 * 4):  # 4KB chunks
+                content_size += len(chunk)
+                # 达到最大下载量时提前结束
+                if content_size >= self.max_download_size:
+                    break
+            
+            duration = time.perf_counter() - start
+            speed = content_size / duration / 1024 if duration > 0 else 0
+            return speed >= min_speed, speed, latency
+
+    async def _probe_single_get(self,
+                                session: aiohttp.ClientSession,
+                                url: str,
+                                headers: Dict[str, str],
+                                timeout: aiohttp.ClientTimeout,
+                                min_speed: float,
+                                max_latency: float) -> Tuple[bool, float, float]:
+        """
+        单次流式GET：首字节时间作为延迟，首字节之后的持续下载速度作为速度
+        响应体只有一个数据块（如短小的播放列表）时按整个请求耗时计算速度
+        """
+        start = time.perf_counter()
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            if resp.status != 200:
+                return False, 0.0, (time.perf_counter() - start) * 1000
+
+            first_chunk = await resp.content.read(1024 * 4)
+            first_byte = time.perf_counter()
+            latency = (first_byte - start) * 1000
+            if latency > max_latency or not first_chunk:
+                return False, 0.0, latency
+
+            speed = await self._stream_speed(resp, start, first_byte, first_chunk)
+            return speed >= min_speed, speed, latency
+
+    async def _stream_speed(self,
+                            resp: aiohttp.ClientResponse,
+                            start: float,
+                            first_byte: float,
+                            first_chunk: bytes) -> float:
+        """读取响应体至 max_download_size，返回首字节之后的持续下载速度(KB/s)"""
+        content_size = len(first_chunk)
+        async for chunk in resp.content.iter_chunked(1024 * 4):
+            content_size += len(chunk)
+            if content_size >= self.max_download_size:
+                break
+
+        end = time.perf_counter()
+        sustained = content_size - len(first_chunk)
+        if sustained > 0 and end > first_byte:
+            return sustained / (end - first_byte) / 1024
+        return content_size / (end - start) / 1024
+
+    async def _read_playlist(self, resp: aiohttp.ClientResponse, first_chunk: bytes) -> str:
+        """读取播放列表全文（超过上限的部分丢弃）"""
+        data = bytearray(first_chunk)
+        async for chunk in resp.content.iter_chunked(1024 * 16):
+            data += chunk
+            if len(data) >= _MAX_PLAYLIST_SIZE:
+                break
+        return data.decode('utf-8', 'replace')
+
+    async def _fetch_playlist(self,
+                              session: aiohttp.ClientSession,
+                              url: str,
+                              headers: Dict[str, str],
+                              timeout: aiohttp.ClientTimeout) -> Optional[Tuple[str, str]]:
+        """下载子播放列表，返回 (文本, 实际地址)，不是播放列表时返回None"""
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            if resp.status != 200:
+                return None
+            first_chunk = await resp.content.read(1024 * 4)
+            if not is_playlist(first_chunk):
+                return None
+            return await self._read_playlist(resp, first_chunk), str(resp.url)
+
+    async def _probe_hls(self,
+                         session: aiohttp.ClientSession,
+                         url: str,
+                         headers: Dict[str, str],
+                         timeout: aiohttp.ClientTimeout,
+                         min_speed: float,
+                         max_latency: float) -> Tuple[bool, float, float]:
+        """
+        HLS测速：播放列表的首字节时间作为延迟；主播放列表选码率最低的档位，
+        下载媒体播放列表中一个分片的前 max_download_size 字节，以分片下载速度作为速度。
+        分片下载速度低于播放所需码率（分片大小/时长，未知时取档位声明码率）的
+        hls_min_realtime 倍时判为不合格。非播放列表的响应按 single_get 方式测速。
+        """
+        start = time.perf_counter()
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            if resp.status != 200:
+                return False, 0.0, (time.perf_counter() - start) * 1000
+
+            first_chunk = await resp.content.read(1024 * 4)
+            first_byte = time.perf_counter()
+            latency = (first_byte - start) * 1000
+            if latency > max_latency or not first_chunk:
+                return False, 0.0, latency
+
+            if not is_playlist(first_chunk):
+                speed = await self._stream_speed(resp, start, first_byte, first_chunk)
+                return speed >= min_speed, speed, latency
+            playlist = parse_playlist(await self._read_playlist(resp, first_chunk), str(resp.url))
+
+        bandwidth = 0
+        if playlist.is_master:
+            variant = playlist.lowest_variant()
+            bandwidth = variant.bandwidth
+            fetched = await self._fetch_playlist(session, variant.url, headers, timeout)
+            if fetched is None:
+                return False, 0.0, latency
+            playlist = parse_playlist(*fetched)
+
+        segment = playlist.probe_segment()
+        if segment is None:
+            return False, 0.0, latency
+
+        segment_headers = headers
+        if segment.byte_range is not None:
+            offset, length = segment.byte_range
+            segment_headers = dict(headers, Range=f"bytes={offset}-{offset + length - 1}")
+
+        segment_start = time.perf_counter()
+        async with session.get(segment.url, headers=segment_headers, timeout=timeout) as resp:
+            if resp.status not in (200, 206):
+                return False, 0.0, latency
+            first_chunk = await resp.content.read(1024 * 4)
+            if not first_chunk:
+                return False, 0.0, latency
+            speed = await self._stream_speed(resp, segment_start, time.perf_counter(), first_chunk)
+            segment_size = resp.content_length or (segment.byte_range[1] if segment.byte_range else 0)
+
+        # 播放所需码率(字节/秒)
+        if segment_size and segment.duration > 0:
+            required = segment_size / segment.duration
+        else:
+            required = bandwidth / 8
+        if not required:
+            return speed >= min_speed, speed, latency
+
+        realtime = speed * 1024 / required
+        self.hls_realtime[url] = realtime
+        self.log.debug("📺 HLS分片 %.1fKB/s | 时长 %.1fs | 实时倍率 %.2f | %s",
+                       speed, segment.duration, realtime, self._simplify_url(segment.url))
+        return speed >= min_speed and realtime >= self.hls_min_realtime, speed, latency
+
     def _handle_success(self,
                       channel: Channel,
                       speed: float,
@@ -381,7 +787,12 @@ class SpeedTester:
         self.failed_ips[ip] += 1
         
         is_udp = self._is_udp_url(channel.url)
+        realtime = self.hls_realtime.get(channel.url)
+        udp_result = self.udp_results.get(channel.url)
         reason = (
+            "无数据包" if udp_result is not None and not udp_result.packets else
+            "非MPEG-TS" if udp_result is not None and self.udp_require_ts and not udp_result.is_ts else
+            "分片下载慢于播放" if realtime is not None and realtime < self.hls_min_realtime else
             "速度不足" if speed > 0 and speed < (
                 self.min_udp_download_speed if is_udp else self.min_download_speed
             ) else
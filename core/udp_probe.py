@@ -0,0 +1,188 @@
+import os
+import time
+import socket
+import asyncio
+import ipaddress
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+# MPEG-TS 包长与同步字节
+TS_PACKET_SIZE = 188
+TS_SYNC_BYTE = 0x47
+
+# 判定为TS流所需的有效数据报比例
+_TS_VALID_RATIO = 0.9
+
+
+@dataclass
+class UdpProbeResult:
+    """UDP/RTP测速结果"""
+    first_packet_ms: float = 0.0  # 加入组播/绑定端口到收到第一个数据报的时间
+    packets: int = 0
+    bytes: int = 0
+    duration: float = 0.0  # 采样时长（秒）
+    ts_checked: int = 0
+    ts_valid: int = 0
+
+    @property
+    def packet_rate(self) -> float:
+        """数据报/秒"""
+        return self.packets / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def speed(self) -> float:
+        """负载速度(KB/s)"""
+        return self.bytes / self.duration / 1024 if self.duration > 0 else 0.0
+
+    @property
+    def is_ts(self) -> bool:
+        """数据报负载是否为MPEG-TS（按同步字节判断）"""
+        return self.ts_checked > 0 and self.ts_valid >= self.ts_checked * _TS_VALID_RATIO
+
+
+def rtp_payload(data: bytes) -> bytes:
+    """去除RTP头（非RTP数据原样返回；TS同步字节0x47的版本位不是2，不会被误判）"""
+    if len(data) < 12 or data[0] >> 6 != 2:
+        return data
+    offset = 12 + 4 * (data[0] & 0x0F)
+    if data[0] & 0x10 and len(data) >= offset + 4:
+        offset += 4 + 4 * int.from_bytes(data[offset + 2:offset + 4], 'big')
+    end = len(data)
+    if data[0] & 0x20 and end > offset:
+        end -= data[-1]
+    return data[offset:end]
+
+
+def is_ts_payload(payload: bytes) -> bool:
+    """负载由完整的TS包组成且每个包以同步字节开头"""
+    if not payload or len(payload) % TS_PACKET_SIZE:
+        return False
+    return all(payload[i] == TS_SYNC_BYTE for i in range(0, len(payload), TS_PACKET_SIZE))
+
+
+class _Collector(asyncio.DatagramProtocol):
+    """统计收到的数据报"""
+
+    def __init__(self, source: Optional[str]):
+        self.source = source
+        self.result = UdpProbeResult()
+        self.first_packet: Optional[float] = None
+        self.sampling_until: Optional[float] = None
+        self.got_first = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if self.source and addr[0] != self.source:
+            return
+        now = time.perf_counter()
+        if self.first_packet is None:
+            self.first_packet = now
+            if not self.got_first.done():
+                self.got_first.set_result(now)
+        elif self.sampling_until is not None and now > self.sampling_until:
+            return
+
+        result = self.result
+        result.packets += 1
+        payload = rtp_payload(data)
+        result.bytes += len(payload)
+        result.ts_checked += 1
+        if is_ts_payload(payload):
+            result.ts_valid += 1
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.got_first.done():
+            self.got_first.set_exception(exc)
+
+
+class UdpProbe:
+    """原生UDP/RTP测速（asyncio数据报）
+
+    组播地址加入组播组，其他地址绑定本地端口（interface 指定的网卡，未指定时为全部地址）接收单播。
+    测量收到第一个数据报的时间，之后在采样窗口内统计包速率和负载速度，
+    并按MPEG-TS同步字节校验负载。
+
+    支持的地址格式: udp://[源地址]@组播地址:端口、udp://组播地址:端口、rtp://... ，
+    指定源地址时只统计来自该源的数据报。
+    """
+
+    def __init__(self, interface: str = '', sample_window: float = 1.0):
+        """
+        参数:
+            interface: 加入组播组/接收单播使用的本地网卡地址（空为系统默认）
+            sample_window: 收到第一个数据报后的采样时长（秒）
+        """
+        self.interface = interface
+        self.sample_window = max(0.1, sample_window)
+
+    @staticmethod
+    def is_native(url: str) -> bool:
+        """是否为原生UDP/RTP地址（udpxy等HTTP代理地址仍走HTTP测速）"""
+        return url[:6].lower() in ('udp://', 'rtp://')
+
+    @staticmethod
+    def parse_url(url: str) -> Tuple[str, int, Optional[str]]:
+        """
+        解析地址
+        返回: (组播/单播地址, 端口, 源地址或None)
+        """
+        source, _, target = urlsplit(url).netloc.rpartition('@')
+        parts = urlsplit(f"//{target}")
+        if parts.port is None:
+            raise ValueError(f"缺少端口: {url}")
+        return parts.hostname or '', parts.port, source.strip('[]') or None
+
+    def _open_socket(self, host: str, port: int) -> socket.socket:
+        try:
+            address = ipaddress.ip_address(host) if host else None
+        except ValueError:
+            address = None  # 主机名：按单播处理
+        family = socket.AF_INET6 if address is not None and address.version == 6 else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+
+            if address is not None and address.is_multicast:
+                # 非Windows系统绑定组播地址本身，避免同端口的其他组播流混入
+                sock.bind((host if os.name != 'nt' else '', port))
+                if family == socket.AF_INET:
+                    mreq = socket.inet_aton(host) + socket.inet_aton(self.interface or '0.0.0.0')
+                    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+                else:
+                    mreq = socket.inet_pton(socket.AF_INET6, host) + (0).to_bytes(4, 'little')
+                    sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP, mreq)
+            else:
+                # 单播：地址中的主机是推流端而非本机地址，绑定本地网卡（未指定时为全部地址）的端口
+                sock.bind((self.interface if family == socket.AF_INET else '', port))
+            sock.setblocking(False)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    async def probe(self, url: str, timeout: float) -> UdpProbeResult:
+        """
+        测速
+        timeout 内未收到数据报时返回 packets=0 的结果；地址无效或端口绑定失败时抛出 OSError/ValueError
+        """
+        host, port, source = self.parse_url(url)
+        loop = asyncio.get_running_loop()
+        sock = self._open_socket(host, port)
+        start = time.perf_counter()
+        transport, collector = await loop.create_datagram_endpoint(lambda: _Collector(source), sock=sock)
+        try:
+            try:
+                first = await asyncio.wait_for(asyncio.shield(collector.got_first), timeout)
+            except asyncio.TimeoutError:
+                return collector.result
+            collector.sampling_until = first + self.sample_window
+            await asyncio.sleep(max(0.0, collector.sampling_until - time.perf_counter()))
+            result = collector.result
+            result.first_packet_ms = (first - start) * 1000
+            result.duration = self.sample_window
+            return result
+        finally:
+            transport.close()
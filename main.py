@@ -3,7 +3,7 @@ import os
 import asyncio
 import configparser
 from pathlib import Path
-from typing import List, Set, Dict, Optional, Tuple, Callable
+from typing import AsyncIterator, List, Set, Dict, Optional, Tuple, Callable, Union
 import re
 import logging
 import gc
@@ -16,7 +16,12 @@ from core import (
     AutoCategoryMatcher,
     SpeedTester,
     ResultExporter,
-    Channel
+    BlacklistMatcher,
+    Channel,
+    LocalSource,
+    ChannelDeduplicator,
+    HistoryIndex,
+    SourcePruner
 )
 from core.progress import SmartProgress
 
@@ -30,24 +35,18 @@ def load_list_file(path: str) -> Set[str]:
         return {line.strip().lower() for line in f if line.strip() and not line.startswith('#')}
 
 def load_urls(path: str) -> List[str]:
-    """加载订阅源URL列表"""
+    """加载订阅源列表（HTTP地址、file://地址或本地文件路径）"""
     file = Path(path)
     if not file.exists():
         raise FileNotFoundError(f"订阅源文件不存在: {file}")
     with open(file, 'r', encoding='utf-8') as f:
         return [line.strip() for line in f if line.strip()]
 
-def is_blacklisted(channel: Channel, blacklist: Set[str]) -> bool:
+def is_blacklisted(channel: Channel, blacklist: BlacklistMatcher) -> bool:
     """检查频道是否在黑名单中"""
-    channel_name = channel.name.lower()
-    channel_url = channel.url.lower()
-    return any(
-        entry in channel_name or entry in channel_url
-        for entry in blacklist
-        if entry.strip() and not entry.startswith('#')
-    )
+    return blacklist.is_blacklisted(channel)
 
-async def fetch_sources(fetcher: SourceFetcher, urls: List[str], logger: logging.Logger) -> List[str]:
+async def fetch_sources(fetcher: SourceFetcher, urls: List[str], logger: logging.Logger) -> List[Union[str, LocalSource]]:
     """获取订阅源内容（带重试）"""
     contents = []
     for attempt in range(1, 3):
@@ -61,44 +60,45 @@ async def fetch_sources(fetcher: SourceFetcher, urls: List[str], logger: logging
                 raise
             logger.warning(f"第{attempt}次获取失败: {str(e)}")
             await asyncio.sleep(2 ** attempt)
-    return [c for c in contents if c and c.strip()]
+    fetcher.log_cache_stats()
+    # 本地文件源为LocalSource（长度即文件大小），不做strip检查
+    return [c for c in contents if c and (not isinstance(c, str) or c.strip())]
 
-def parse_channels(parser: PlaylistParser, contents: List[str], logger: logging.Logger) -> List[Channel]:
-    """解析所有频道"""
+def parse_channels(parser: PlaylistParser, contents: List[Union[str, LocalSource]], logger: logging.Logger) -> List[Channel]:
+    """解析所有频道（源较多时多进程解析，结果按源顺序合并）"""
     all_channels = []
     progress = SmartProgress(len(contents), "解析进度")
     
-    for content in contents:
-        try:
-            channels = list(parser.parse(content))
-            all_channels.extend(channels)
-            
-            if len(all_channels) % 5000 == 0:
-                gc.collect()
-                
-            progress.update()
-        except Exception as e:
-            logger.error(f"解析异常: {str(e)}")
-            continue
+    for channels in parser.parse_sources(contents, progress.update):
+        all_channels.extend(channels)
     
     progress.complete()
+    parser.log_cache_stats()
     return all_channels
 
-def remove_duplicates(channels: List[Channel], logger: logging.Logger) -> List[Channel]:
-    """去重处理"""
+def remove_duplicates(channels: List[Channel], logger: logging.Logger,
+                      deduplicator: Optional[ChannelDeduplicator] = None) -> List[Channel]:
+    """去重处理（按解析时计算的规范化URL键，每个键保留一个代表频道）"""
+    deduplicator = deduplicator or ChannelDeduplicator()
     progress = SmartProgress(len(channels), "去重进度")
-    unique_channels = {channel.url: channel for channel in channels}
+    unique_channels = deduplicator.dedupe(channels)
     progress.update(len(channels))
     progress.complete()
-    return list(unique_channels.values())
+    deduplicator.log_stats()
+    return unique_channels
 
-def filter_blacklist(channels: List[Channel], blacklist: Set[str], logger: logging.Logger) -> List[Channel]:
+def filter_blacklist(channels: List[Channel], blacklist: BlacklistMatcher, logger: logging.Logger) -> List[Channel]:
     """黑名单过滤"""
     if not blacklist:
         return channels
         
     progress = SmartProgress(len(channels), "过滤进度")
-    filtered = [c for c in channels if not is_blacklisted(c, blacklist)]
+    filtered, removed = blacklist.filter(channels)
+    for channel, entry in removed:
+        logger.debug(f"黑名单命中 | {entry} | {channel.name} | {channel.url}")
+    if removed:
+        top_hits = ", ".join(f"{entry}({count})" for entry, count in blacklist.hits.most_common(5))
+        logger.info(f"• 黑名单过滤: {len(removed)}条 | 高频条目: {top_hits}")
     progress.update(len(channels))
     progress.complete()
     return filtered
@@ -119,8 +119,93 @@ def classify_channels(matcher: AutoCategoryMatcher, channels: List[Channel], log
         progress.update()
     
     progress.complete()
+    matcher.save_result_cache()
+    matcher.log_cache_stats()
     return processed
 
+async def stream_channels(fetcher: SourceFetcher, parser: PlaylistParser, urls: List[str],
+                          blacklist: BlacklistMatcher, stats: Dict[str, int],
+                          logger: logging.Logger,
+                          deduplicator: Optional[ChannelDeduplicator] = None) -> AsyncIterator[Channel]:
+    """流式获取+解析+去重+黑名单过滤（源到达即解析，解析后立即释放源内容）"""
+    loop = asyncio.get_running_loop()
+    deduplicator = deduplicator or ChannelDeduplicator()
+    progress = SmartProgress(len(urls), "流式获取/解析")
+
+    async for url, content in fetcher.iter_sources(urls, lambda: None):
+        progress.update()
+        if not content or (isinstance(content, str) and not content.strip()):
+            continue
+        stats['sources'] += 1
+        try:
+            # 在线程中解析，避免阻塞其它源的下载
+            channels = await loop.run_in_executor(None, lambda c=content: parser.parse_source(c))
+        except Exception as e:
+            logger.error(f"解析异常: {url} - {str(e)}")
+            continue
+        finally:
+            del content
+
+        for channel in channels:
+            stats['parsed'] += 1
+            if not deduplicator.accept(channel):
+                continue
+            stats['unique'] += 1
+            if blacklist and blacklist.is_blacklisted(channel):
+                stats['blacklisted'] += 1
+                continue
+            yield channel
+
+    progress.complete()
+    fetcher.log_cache_stats()
+    parser.log_cache_stats()
+    deduplicator.log_stats()
+
+async def run_stream_pipeline(fetcher: SourceFetcher, parser: PlaylistParser, matcher: AutoCategoryMatcher,
+                              urls: List[str], blacklist: BlacklistMatcher,
+                              logger: logging.Logger,
+                              deduplicator: Optional[ChannelDeduplicator] = None) -> List[Channel]:
+    """流式处理阶段2-5：频道逐个去重、过滤并分类，只保留最终结果"""
+    stats: Dict[str, int] = defaultdict(int)
+    processed = []
+    async for channel in stream_channels(fetcher, parser, urls, blacklist, stats, logger, deduplicator):
+        channel.category = matcher.match(channel.name)
+        channel.name = matcher.normalize_channel_name(channel.name)
+        processed.append(channel)
+
+    matcher.save_result_cache()
+    matcher.log_cache_stats()
+    logger.info(
+        f"✅ 流式处理完成 | 成功源: {stats['sources']}/{len(urls)} | 总频道: {stats['parsed']} | "
+        f"去重后: {stats['unique']} | 过滤后: {stats['unique'] - stats['blacklisted']}"
+    )
+    return processed
+
+def load_history(config: configparser.ConfigParser) -> HistoryIndex:
+    """
+    加载历史索引：只在开启历史记录（[EXPORTER] enable_history）且历史排序或候选源裁剪需要时读取，
+    否则返回空索引（测速顺序、超时与不使用历史时一致）
+    """
+    if not config.getboolean('EXPORTER', 'enable_history', fallback=False):
+        return HistoryIndex()
+    if not (config.getboolean('TESTER', 'enable_history_ordering', fallback=False)
+            or config.getboolean('PRUNER', 'enable_source_cap', fallback=False)):
+        return HistoryIndex()
+    return HistoryIndex.from_config(config)
+
+def prune_sources(pruner: Optional[SourcePruner], channels: List[Channel], whitelist: Set[str],
+                  logger: logging.Logger) -> List[Channel]:
+    """测速前限制每个频道的候选源数量，返回需要测速的频道"""
+    if pruner is None:
+        return channels
+    kept, pruned = pruner.prune(channels, whitelist)
+    if pruned:
+        logger.info(
+            f"• 候选源裁剪: 每频道最多{pruner.max_sources}个 | 待测速: {len(kept)} | 跳过: {len(pruned)} | "
+            f"历史记录: {len(pruner.history)}条URL"
+        )
+    return kept
+
 async def test_channels(tester: SpeedTester, channels: List[Channel], whitelist: Set[str], logger: logging.Logger) -> Set[str]:
     """测速测试"""
     if not channels:
@@ -128,6 +213,8 @@ async def test_channels(tester: SpeedTester, channels: List[Channel], whitelist:
         return set()
 
     failed_urls = set()
+    # 全局排序一次（历史在线可能性/候选名次），分批测试时最有价值的结果最先得到
+    channels = tester.prioritize(channels)
     batch_size = min(5000, len(channels))
     progress = SmartProgress(len(channels), "测速进度")
     
@@ -251,60 +338,87 @@ async def main():
 
         # ==================== 数据准备阶段 ====================
         logger.info("\n🔹🔹 阶段1/7：数据准备")
-        blacklist = load_list_file(config.get('BLACKLIST', 'blacklist_path', fallback='config/blacklist.txt'))
+        blacklist = BlacklistMatcher(load_list_file(config.get('BLACKLIST', 'blacklist_path', fallback='config/blacklist.txt')))
         whitelist = load_list_file(config.get('WHITELIST', 'whitelist_path', fallback='config/whitelist.txt'))
         urls = load_urls(config.get('PATHS', 'urls_path', fallback='config/urls.txt'))
         logger.info(f"• 加载黑名单: {len(blacklist)}条")
         logger.info(f"• 加载白名单: {len(whitelist)}条")
         logger.info(f"• 加载订阅源: {len(urls)}个")
 
-        # ==================== 订阅源获取阶段 ====================
-        logger.info("\n🔹🔹 阶段2/7：获取订阅源")
         fetcher = SourceFetcher(
             timeout=config.getfloat('FETCHER', 'timeout', fallback=15),
             concurrency=config.getint('FETCHER', 'concurrency', fallback=5),
             config=config
         )
-        contents = await fetch_sources(fetcher, urls, logger)
-        logger.info(f"✅ 获取完成 | 成功: {len(contents)}/{len(urls)}")
-
-        # ==================== 频道解析阶段 ====================
-        logger.info("\n🔹🔹 阶段3/7：解析频道")
         parser = PlaylistParser(config)
-        all_channels = parse_channels(parser, contents, logger)
-        unique_sources = len({c.url for c in all_channels})
-        logger.info(f"✅ 解析完成 | 总频道: {len(all_channels)} | 唯一源: {unique_sources}")
-
-        # ==================== 数据处理阶段 ====================
-        logger.info("\n🔹🔹 阶段4/7：数据处理")
-        unique_channels = remove_duplicates(all_channels, logger)
-        filtered_channels = filter_blacklist(unique_channels, blacklist, logger)
-        logger.info(f"✔ 处理完成 | 去重后: {len(unique_channels)} | 过滤后: {len(filtered_channels)}")
-
-        # ==================== 智能分类阶段 ====================
-        logger.info("\n🔹🔹 阶段5/7：智能分类")
-        matcher = AutoCategoryMatcher(
-            config.get('PATHS', 'templates_path', fallback='config/templates.txt'),
-            config
-        )
-        processed_channels = classify_channels(matcher, filtered_channels, logger)
+        deduplicator = ChannelDeduplicator.from_config(config)
+        pipeline_mode = config.get('MAIN', 'pipeline_mode', fallback='batch').strip().lower()
+
+        if pipeline_mode == 'stream':
+            # ==================== 流式处理阶段 ====================
+            logger.info("\n🔹🔹 阶段2-5/7：流式获取/解析/过滤/分类")
+            matcher = AutoCategoryMatcher(
+                config.get('PATHS', 'templates_path', fallback='config/templates.txt'),
+                config
+            )
+            processed_channels = await run_stream_pipeline(
+                fetcher, parser, matcher, urls, blacklist, logger, deduplicator
+            )
+        else:
+            # ==================== 订阅源获取阶段 ====================
+            logger.info("\n🔹🔹 阶段2/7：获取订阅源")
+            contents = await fetch_sources(fetcher, urls, logger)
+            logger.info(f"✅ 获取完成 | 成功: {len(contents)}/{len(urls)}")
+
+            # ==================== 频道解析阶段 ====================
+            logger.info("\n🔹🔹 阶段3/7：解析频道")
+            all_channels = parse_channels(parser, contents, logger)
+            del contents
+            unique_sources = len({c.url_key or c.url for c in all_channels})
+            logger.info(f"✅ 解析完成 | 总频道: {len(all_channels)} | 唯一源: {unique_sources}")
+
+            # ==================== 数据处理阶段 ====================
+            logger.info("\n🔹🔹 阶段4/7：数据处理")
+            unique_channels = remove_duplicates(all_channels, logger, deduplicator)
+            del all_channels
+            filtered_channels = filter_blacklist(unique_channels, blacklist, logger)
+            logger.info(f"✔ 处理完成 | 去重后: {len(unique_channels)} | 过滤后: {len(filtered_channels)}")
+            del unique_channels
+
+            # ==================== 智能分类阶段 ====================
+            logger.info("\n🔹🔹 阶段5/7：智能分类")
+            matcher = AutoCategoryMatcher(
+                config.get('PATHS', 'templates_path', fallback='config/templates.txt'),
+                config
+            )
+            processed_channels = classify_channels(matcher, filtered_channels, logger)
+
         classified = sum(1 for c in processed_channels if c.category != "未分类")
         logger.info(f"✅ 分类完成 | 已分类: {classified} | 未分类: {len(processed_channels)-classified}")
 
         # ==================== 测速测试阶段 ====================
         logger.info("\n🔹🔹 阶段6/7：测速测试")
+        history = load_history(config)
         tester = SpeedTester(
             timeout=config.getfloat('TESTER', 'timeout', fallback=10),
             concurrency=config.getint('TESTER', 'concurrency', fallback=8),
             max_attempts=config.getint('TESTER', 'max_attempts', fallback=2),
             min_download_speed=config.getfloat('TESTER', 'min_download_speed', fallback=0.1),
             enable_logging=config.getboolean('TESTER', 'enable_logging', fallback=False),  # 关键修复点
-            config=config
+            config=config,
+            history=history
         )
         sorted_channels = matcher.sort_channels_by_template(processed_channels, whitelist)
-        failed_urls = await test_channels(tester, sorted_channels, whitelist, logger)
+        test_targets = prune_sources(SourcePruner.from_config(config, history), sorted_channels, whitelist, logger)
+        failed_urls = await test_channels(tester, test_targets, whitelist, logger)
         online_count = sum(1 for c in sorted_channels if c.status == 'online')
-        logger.info(f"✅ 测速完成 | 在线: {online_count}/{len(sorted_channels)} | 失败: {len(failed_urls)}")
+        skipped_count = sum(1 for c in sorted_channels if c.status in ('skipped', 'pruned'))
+        logger.info(
+            f"✅ 测速完成 | 在线: {online_count}/{len(sorted_channels)} | 失败: {len(failed_urls)} | "
+            f"未测速(已有足够在线源/裁剪): {skipped_count} | 复用历史结果: {tester.reused_count}"
+        )
+        if tester.deadline_skipped:
+            logger.info(f"• 已到测速截止时间({tester.test_deadline:g}s)，未测速: {tester.deadline_skipped}")
 
         # ==================== 结果导出阶段 ====================
         logger.info("\n🔹🔹 阶段7/7：结果导出")
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# 测试直接导入仓库根目录下的 core 包
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,25 @@
+"""测试用本地aiohttp桩服务"""
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+
+@asynccontextmanager
+async def stub_server(routes, host: str = '127.0.0.1'):
+    """
+    启动本地桩服务（路由: 路径 -> 处理函数），返回基础地址
+    host='0.0.0.0' 时可通过 127.0.0.x 任意回环地址访问（返回地址的主机部分为 127.0.0.1）
+    """
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    # 客户端取消请求（对冲落败）时同时取消服务端处理，关闭服务不必等待慢响应
+    runner = web.AppRunner(app, handler_cancellation=True)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,26 @@
+"""黑名单URL前缀索引：二分查找与逐条前缀比较的命中条目一致"""
+import random
+
+from core import Channel
+from core.blacklist import BlacklistMatcher
+
+
+def linear_match(prefixes, url):
+    """原实现：按序逐条 startswith"""
+    return next((prefix for prefix in prefixes if url.startswith(prefix)), None)
+
+
+def test_prefix_bisect_matches_linear_scan():
+    authority = 'http://iptv.example:8080'
+    rng = random.Random(7)
+    paths = ['/live', '/live/', '/live/a', '/live/a?id=', '/live/ab', '/live/b=', '/play?', '/play?id=1', '/play?id=12']
+    paths += [f"/ch{rng.randrange(300)}/{rng.choice(['', 'index', 'index.m3u8?t='])}" for _ in range(200)]
+    matcher = BlacklistMatcher(authority + path for path in paths)
+    prefixes = matcher.url_prefixes[authority]
+    assert prefixes == sorted(prefixes)
+
+    urls = [authority + path + suffix for path in paths for suffix in ('', 'x', '/1.m3u8', '&token=1')]
+    urls += [authority + path for path in ('/', '/liv', '/lived', '/play', '/ch', '/ch3', '/other/live')]
+    for url in urls:
+        assert matcher._match_prefix(prefixes, url) == linear_match(prefixes, url), url
+        assert matcher.match(Channel('测试', url)) == linear_match(prefixes, url), url
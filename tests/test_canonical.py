@@ -0,0 +1,33 @@
+"""规范化去重：合并统计只计入合并所依赖的规则"""
+from core import Channel
+from core.canonical import ChannelDeduplicator, UrlCanonicalizer
+
+
+def dedupe(*urls):
+    deduplicator = ChannelDeduplicator(UrlCanonicalizer(['utm_*', 'token']), strategy='first')
+    kept = deduplicator.dedupe(Channel('CCTV1', url) for url in urls)
+    return kept, dict(deduplicator.collapsed)
+
+
+def test_rules_firing_on_both_urls_are_not_credited():
+    # 两个URL都去掉了 utm 参数和锚点，合并只依赖末尾斜杠
+    kept, collapsed = dedupe('http://a.example/live?utm_source=x#top', 'http://a.example/live/?utm_source=x#top')
+    assert len(kept) == 1
+    assert collapsed == {'trailing_slash': 1}
+
+
+def test_each_differing_rule_is_credited():
+    kept, collapsed = dedupe('HTTP://A.example:80/live?b=2&a=1', 'http://a.example/live?a=1&b=2&token=9')
+    assert len(kept) == 1
+    assert collapsed == {'host_case': 1, 'default_port': 1, 'query_order': 1, 'ignored_params': 1}
+
+
+def test_same_rule_with_different_values_is_credited():
+    # 两边都去掉了鉴权参数，但参数值不同，合并依赖 ignored_params
+    _, collapsed = dedupe('http://a.example/live?id=1&token=a', 'http://a.example/live?id=1&token=b')
+    assert collapsed == {'ignored_params': 1}
+
+
+def test_exact_duplicates():
+    _, collapsed = dedupe('http://a.example/live', 'http://a.example/live')
+    assert collapsed == {'exact': 1}
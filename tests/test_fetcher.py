@@ -0,0 +1,242 @@
+"""订阅源获取：对冲请求、镜像竞速、条件请求缓存（本地aiohttp桩服务）"""
+import asyncio
+import configparser
+
+from aiohttp import web
+
+from core.fetcher import SourceFetcher
+from stub_server import stub_server
+
+
+def make_fetcher(concurrency: int = 10, retries: int = 0, **fetcher_options) -> SourceFetcher:
+    config = configparser.ConfigParser()
+    config.read_dict({'FETCHER': {'enable_source_cache': 'false', **fetcher_options}})
+    return SourceFetcher(10, concurrency, retries, config)
+
+
+def test_mirror_wins_over_slow_primary():
+    hits = {'slow': 0, 'fast': 0}
+
+    async def slow(request):
+        hits['slow'] += 1
+        await asyncio.sleep(5)
+        return web.Response(text='#EXTM3U\nslow')
+
+    async def fast(request):
+        hits['fast'] += 1
+        return web.Response(text='#EXTM3U\nfast')
+
+    async def run():
+        async with stub_server({'/slow': slow, '/fast': fast}) as base:
+            fetcher = make_fetcher(hedge_delay='0.2')
+            result = await asyncio.wait_for(
+                fetcher.fetch_all([f"{base}/slow {base}/fast"], lambda: None), 3
+            )
+            return fetcher, result
+
+    fetcher, result = asyncio.run(run())
+    assert result == ['#EXTM3U\nfast']
+    assert hits == {'slow': 1, 'fast': 1}
+    assert fetcher.hedge_stats == {'hedged': 1, 'mirror_wins': 1}
+
+
+def test_failed_primary_falls_back_to_mirror_immediately():
+    async def broken(request):
+        return web.Response(status=500)
+
+    async def ok(request):
+        return web.Response(text='#EXTM3U\nok')
+
+    async def run():
+        async with stub_server({'/broken': broken, '/ok': ok}) as base:
+            # 对冲等待远大于测试时长：镜像只能因主地址失败而启动
+            fetcher = make_fetcher(hedge_delay='30')
+            return fetcher, await asyncio.wait_for(
+                fetcher.fetch_all([f"{base}/broken {base}/ok"], lambda: None), 3
+            )
+
+    fetcher, result = asyncio.run(run())
+    assert result == ['#EXTM3U\nok']
+    assert fetcher.hedge_stats == {'hedged': 0, 'mirror_wins': 1}
+
+
+def test_hedged_duplicate_request_for_single_url():
+    hits = []
+
+    async def flaky(request):
+        hits.append(1)
+        if len(hits) == 1:
+            await asyncio.sleep(5)
+        return web.Response(text='#EXTM3U\nflaky')
+
+    async def run():
+        async with stub_server({'/flaky': flaky}) as base:
+            fetcher = make_fetcher(enable_hedging='true', hedge_delay='0.2')
+            return fetcher, await asyncio.wait_for(fetcher.fetch_all([f"{base}/flaky"], lambda: None), 3)
+
+    fetcher, result = asyncio.run(run())
+    assert result == ['#EXTM3U\nflaky']
+    assert len(hits) == 2
+    assert fetcher.hedge_stats['hedged'] == 1
+
+
+def test_queued_sources_are_not_hedged():
+    hits = []
+
+    async def source(request):
+        hits.append(request.match_info['n'])
+        await asyncio.sleep(0.3)
+        return web.Response(text='#EXTM3U\n' + request.match_info['n'])
+
+    async def run():
+        async with stub_server({'/{n}': source}) as base:
+            # 单个请求耗时0.3s，小于对冲等待；排队等待名额的时间不应触发对冲
+            fetcher = make_fetcher(concurrency=2, enable_hedging='true', hedge_delay='0.5', hedge_min_samples='1000')
+            urls = [f"{base}/{i}" for i in range(8)]
+            return fetcher, await asyncio.wait_for(fetcher.fetch_all(urls, lambda: None), 10)
+
+    fetcher, result = asyncio.run(run())
+    assert result == [f'#EXTM3U\n{i}' for i in range(8)]
+    assert len(hits) == 8
+    assert fetcher.hedge_stats['hedged'] == 0
+    # 耗时样本只统计持有名额后的请求时间
+    assert max(fetcher._latencies) < 0.5
+
+
+def cached_fetcher(cache_dir, **fetcher_options) -> SourceFetcher:
+    return make_fetcher(enable_source_cache='true', source_cache_dir=str(cache_dir), **fetcher_options)
+
+
+def test_conditional_get_200_then_304(tmp_path):
+    requests = []
+    body = {'text': '#EXTM3U\nv1', 'etag': '"v1"'}
+
+    async def source(request):
+        requests.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == body['etag']:
+            return web.Response(status=304)
+        return web.Response(text=body['text'], headers={'ETag': body['etag']})
+
+    async def run(fetcher, base):
+        return (await fetcher.fetch_all([f"{base}/list.m3u"], lambda: None))[0]
+
+    async def scenario():
+        async with stub_server({'/list.m3u': source}) as base:
+            first = cached_fetcher(tmp_path)
+            assert await run(first, base) == '#EXTM3U\nv1'
+            assert first.cache_stats['downloaded'] == 1
+
+            second = cached_fetcher(tmp_path)
+            assert await run(second, base) == '#EXTM3U\nv1'
+            assert second.cache_stats['not_modified'] == 1
+            assert second.cache_stats['downloaded'] == 0
+
+            # 源更新后按200重新下载并替换缓存
+            body.update(text='#EXTM3U\nv2', etag='"v2"')
+            third = cached_fetcher(tmp_path)
+            assert await run(third, base) == '#EXTM3U\nv2'
+            assert third.cache_stats['downloaded'] == 1
+
+    asyncio.run(scenario())
+    assert requests == [None, '"v1"', '"v1"']
+
+
+def test_error_serves_stale_copy(tmp_path):
+    state = {'status': 200}
+
+    async def source(request):
+        if state['status'] != 200:
+            return web.Response(status=state['status'])
+        return web.Response(text='#EXTM3U\ncached', headers={'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+
+    async def scenario():
+        async with stub_server({'/list.m3u': source}) as base:
+            url = f"{base}/list.m3u"
+            assert await cached_fetcher(tmp_path).fetch_all([url], lambda: None) == ['#EXTM3U\ncached']
+
+            state['status'] = 503
+            fetcher = cached_fetcher(tmp_path)
+            assert await fetcher.fetch_all([url], lambda: None) == ['#EXTM3U\ncached']
+            assert fetcher.cache_stats['stale'] == 1
+
+            strict = cached_fetcher(tmp_path, serve_stale_on_error='false')
+            assert await strict.fetch_all([url], lambda: None) == ['']
+
+    asyncio.run(scenario())
+
+
+def test_oversized_download_keeps_previous_copy(tmp_path):
+    state = {'text': '#EXTM3U\nsmall'}
+
+    async def source(request):
+        return web.Response(text=state['text'], headers={'ETag': str(len(state['text']))})
+
+    async def scenario():
+        async with stub_server({'/list.m3u': source}) as base:
+            url = f"{base}/list.m3u"
+            assert await cached_fetcher(tmp_path).fetch_all([url], lambda: None) == ['#EXTM3U\nsmall']
+
+            state['text'] = '#EXTM3U\n' + 'x' * 4096
+            fetcher = cached_fetcher(tmp_path, max_source_size='1024')
+            assert await fetcher.fetch_all([url], lambda: None) == ['#EXTM3U\nsmall']
+            assert fetcher.cache_stats['stale'] == 1
+
+    asyncio.run(scenario())
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_ttl_skips_request_without_validators(tmp_path):
+    requests = []
+
+    async def source(request):
+        requests.append(1)
+        return web.Response(text='#EXTM3U\nttl')
+
+    async def scenario():
+        async with stub_server({'/list.m3u': source}) as base:
+            url = f"{base}/list.m3u"
+            for _ in range(2):
+                fetcher = cached_fetcher(tmp_path, source_cache_ttl='3600')
+                assert await fetcher.fetch_all([url], lambda: None) == ['#EXTM3U\nttl']
+            return fetcher
+
+    fetcher = asyncio.run(scenario())
+    assert len(requests) == 1
+    assert fetcher.cache_stats['fresh'] == 1
+
+
+def test_mirror_copy_is_cached_under_primary_url(tmp_path):
+    state = {'mirror': 200}
+    requests = []
+
+    async def primary(request):
+        requests.append(('primary', request.headers.get('If-None-Match')))
+        return web.Response(status=500)
+
+    async def mirror(request):
+        requests.append(('mirror', request.headers.get('If-None-Match')))
+        if state['mirror'] != 200:
+            return web.Response(status=state['mirror'])
+        if request.headers.get('If-None-Match') == '"m1"':
+            return web.Response(status=304)
+        return web.Response(text='#EXTM3U\nmirror', headers={'ETag': '"m1"'})
+
+    async def scenario():
+        async with stub_server({'/primary': primary, '/mirror': mirror}) as base:
+            spec = f"{base}/primary {base}/mirror"
+            assert await cached_fetcher(tmp_path, hedge_delay='30').fetch_all([spec], lambda: None) == ['#EXTM3U\nmirror']
+
+            # 镜像的校验头只发给镜像，主地址不带校验头
+            fetcher = cached_fetcher(tmp_path, hedge_delay='30')
+            assert await fetcher.fetch_all([spec], lambda: None) == ['#EXTM3U\nmirror']
+            assert fetcher.cache_stats['not_modified'] == 1
+
+            # 主地址和镜像都不可用时，按主地址回退到镜像下载的副本
+            state['mirror'] = 503
+            fetcher = cached_fetcher(tmp_path, hedge_delay='30')
+            assert await fetcher.fetch_all([spec], lambda: None) == ['#EXTM3U\nmirror']
+            assert fetcher.cache_stats['stale'] == 1
+
+    asyncio.run(scenario())
+    assert requests[:4] == [('primary', None), ('mirror', None), ('primary', None), ('mirror', '"m1"')]
+    assert len(list(tmp_path.glob('*.json'))) == 1
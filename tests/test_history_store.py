@@ -0,0 +1,50 @@
+"""SQLite历史库：写入、按次数保留、查询"""
+import configparser
+
+from core import Channel
+from core.history_store import HistoryStore, _percentiles
+
+
+def run_channels(online: bool):
+    return [
+        Channel('CCTV1', 'http://a.example/1.m3u8', status='online' if online else 'offline', response_time=100),
+        Channel('CCTV1', 'http://b.example/1.m3u8', status='offline'),
+        Channel('CCTV2', 'http://a.example/2.m3u8', status='skipped'),
+    ]
+
+
+def test_max_runs_compaction_and_queries(tmp_path):
+    path = tmp_path / 'history.sqlite'
+    store = HistoryStore(str(path))
+    for run in range(5):
+        store.append_run(run_channels(online=run % 2 == 0), started_at=1000.0 + run)
+        store.compact(max_runs=3)
+    assert store.run_count() == 3
+
+    # 保留最近3次（第3~5次）：在线、离线、在线
+    url = store.url_stats('http://a.example/1.m3u8')
+    assert (url.tests, url.online, url.last_online) == (3, 2, 1004.0)
+    assert store.host_stats('a.example').tests == 3  # skipped 不计入
+    channel = store.channel_stats('CCTV1')
+    assert (channel.tests, channel.online) == (3, 2)
+    assert channel.latency[50] == 100
+    assert [status for _, status, _, _ in store.iter_recent(1)] == ['online', 'offline', 'skipped']
+    store.close()
+
+
+def test_percentiles_use_nearest_rank():
+    # 第 ceil(p/100*n) 个值：n=10 时 p25 取第3个（四舍五入取整会得到第2个）
+    assert _percentiles(list(range(10, 0, -1)), (25, 50, 90, 99)) == {25: 3, 50: 5, 90: 9, 99: 10}
+    assert _percentiles([7.0], (50, 99)) == {50: 7.0, 99: 7.0}
+    assert _percentiles([], (50,)) == {}
+
+
+def test_from_config_defaults_to_csv_and_cache_path(tmp_path, monkeypatch):
+    config = configparser.ConfigParser()
+    assert HistoryStore.from_config(config) is None
+
+    monkeypatch.chdir(tmp_path)
+    config.read_dict({'HISTORY': {'history_backend': 'sqlite'}})
+    store = HistoryStore.from_config(config)
+    assert store.path.as_posix() == 'cache/history.sqlite'
+    store.close()
@@ -0,0 +1,117 @@
+"""HLS播放列表解析与分片测速（本地aiohttp桩服务）"""
+import asyncio
+import configparser
+
+from aiohttp import web
+
+from core import Channel, SpeedTester
+from core.hls import is_playlist, parse_playlist
+from stub_server import stub_server
+
+SEGMENT_SIZE = 400000  # 4秒分片，播放所需码率约 100KB/s
+
+MASTER = (
+    "#EXTM3U\n"
+    "#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080\nhi.m3u8\n"
+    '#EXT-X-STREAM-INF:BANDWIDTH=800000,CODECS="avc1.4d401f,mp4a.40.2"\nlo.m3u8\n'
+)
+
+
+def media_playlist(prefix: str, count: int = 5, ended: bool = False) -> str:
+    body = "#EXTM3U\n#EXT-X-TARGETDURATION:4\n#EXT-X-MEDIA-SEQUENCE:100\n"
+    body += "".join(f"#EXTINF:4.0,\n{prefix}{100 + i}.ts\n" for i in range(count))
+    return body + ("#EXT-X-ENDLIST\n" if ended else "")
+
+
+BYTERANGE = (
+    "#EXTM3U\n#EXT-X-TARGETDURATION:4\n"
+    "#EXTINF:4,\n#EXT-X-BYTERANGE:400000@0\nall.ts\n"
+    "#EXTINF:4,\n#EXT-X-BYTERANGE:400000\nall.ts\n"
+    "#EXT-X-ENDLIST\n"
+)
+
+
+def test_parse_master_and_media_playlists():
+    master = parse_playlist(MASTER, 'http://h/live/master.m3u8')
+    assert master.is_master
+    assert master.lowest_variant().url == 'http://h/live/lo.m3u8'
+
+    live = parse_playlist(media_playlist('/seg/lo_'), 'http://h/live/lo.m3u8')
+    assert not live.ended
+    assert live.probe_segment().url == 'http://h/seg/lo_102.ts'
+    vod = parse_playlist(media_playlist('seg/vod_', ended=True), 'http://h/v/vod.m3u8')
+    assert vod.probe_segment().url == 'http://h/v/seg/vod_100.ts'
+
+    ranged = parse_playlist(BYTERANGE, 'http://h/b/br.m3u8')
+    assert [s.byte_range for s in ranged.segments] == [(0, 400000), (400000, 400000)]
+    assert is_playlist(b'\xef\xbb\xbf#EXTM3U\n')
+    assert not is_playlist(b'\x47' * 188)
+
+
+def test_hls_probe_measures_segment_speed():
+    requests = []
+
+    async def playlist(request):
+        requests.append(request.path)
+        name = request.match_info['name']
+        if name == 'master':
+            text = MASTER
+        elif name == 'lo':
+            text = media_playlist('/seg/lo_')
+        elif name == 'vod':
+            text = media_playlist('seg/vod_', ended=True)
+        elif name == 'br':
+            text = BYTERANGE
+        elif name == 'slow':
+            text = media_playlist('/slowseg/s_')
+        else:
+            text = "#EXTM3U\n"
+        return web.Response(text=text)
+
+    async def segment(request):
+        requests.append(request.path)
+        if request.headers.get('Range'):
+            requests.append('range:' + request.headers['Range'])
+        # 慢分片 40KB/s，低于播放所需码率
+        rate = 40 * 1024 if request.path.startswith('/slowseg') else 8 * 1024 * 1024
+        response = web.StreamResponse(status=206 if request.headers.get('Range') else 200)
+        response.content_length = SEGMENT_SIZE
+        await response.prepare(request)
+        chunk = b'\x47' + b'x' * 8191
+        for _ in range(0, SEGMENT_SIZE, 8192):
+            await response.write(chunk)
+            await asyncio.sleep(len(chunk) / rate)
+        return response
+
+    routes = {'/{dir}/{name}.m3u8': playlist, '/{dir}/{seg}.ts': segment, '/{dir}/seg/{seg}.ts': segment}
+    paths = {
+        'master': '/live/master.m3u8', 'media': '/live/lo.m3u8', 'vod': '/v/vod.m3u8',
+        'byterange': '/b/br.m3u8', 'slow': '/x/slow.m3u8', 'empty': '/e/empty.m3u8',
+    }
+    config = configparser.ConfigParser()
+    config.read_dict({'TESTER': {
+        'probe_mode': 'hls', 'max_http_latency': '1000', 'max_download_size': '32768', 'hls_min_realtime': '1.0',
+    }})
+    tester = SpeedTester(timeout=5, concurrency=10, max_attempts=1, min_download_speed=0.1,
+                         enable_logging=False, config=config)
+
+    async def run():
+        async with stub_server(routes) as base:
+            channels = [Channel(name, base + path) for name, path in paths.items()]
+            await tester.test_channels(channels, lambda *args: None, set(), set())
+            return channels
+
+    channels = asyncio.run(run())
+    status = {c.name: c.status for c in channels}
+    assert status == {
+        'master': 'online', 'media': 'online', 'vod': 'online',
+        'byterange': 'online', 'slow': 'offline', 'empty': 'offline',
+    }
+    by_name = {c.name: c for c in channels}
+    assert tester.hls_realtime[by_name['media'].url] >= 1.0
+    assert tester.hls_realtime[by_name['slow'].url] < 1.0
+    # 主列表选择最低码率档位，直播取倒数第3个分片，点播取第一个分片，字节范围转为Range请求
+    assert '/live/hi.m3u8' not in requests
+    assert requests.count('/seg/lo_102.ts') == 2
+    assert '/v/seg/vod_100.ts' in requests
+    assert 'range:bytes=0-399999' in requests
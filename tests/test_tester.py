@@ -0,0 +1,148 @@
+"""测速顺序：历史排序与候选名次轮转在IP分组后保持不变（本地aiohttp桩服务）"""
+import asyncio
+import configparser
+
+from aiohttp import web
+
+from core import Channel, HistoryIndex, SpeedTester
+from stub_server import stub_server
+
+
+def make_tester(history=None, **tester_options) -> SpeedTester:
+    config = configparser.ConfigParser()
+    config.read_dict({'TESTER': {'probe_mode': 'single_get', 'max_http_latency': '2000', **tester_options}})
+    return SpeedTester(timeout=5, concurrency=2, max_attempts=1, min_download_speed=0.1,
+                       enable_logging=False, config=config, history=history)
+
+
+def run_scenario(build, offline=()):
+    """
+    启动桩服务后由 build(端口) 构造 (测速器, 频道列表)，
+    按 main.test_channels 的方式排序一次后测速，返回服务端收到请求的顺序
+    """
+    arrivals = []
+
+    async def stream(request):
+        name = request.match_info['name']
+        arrivals.append(name)
+        if name in offline:
+            return web.Response(status=404)
+        await asyncio.sleep(0.05)
+        return web.Response(body=b'\x47' * 4096)
+
+    async def scenario():
+        # 监听所有地址，127.0.0.x 各自作为独立的IP分组
+        async with stub_server({'/{name}.ts': stream}, host='0.0.0.0') as base:
+            tester, channels = build(base.rsplit(':', 1)[1])
+            await tester.test_channels(tester.prioritize(channels), lambda *args: None, set(), set())
+            return channels
+
+    return asyncio.run(scenario()), arrivals
+
+
+def test_history_order_survives_ip_grouping():
+    # 每台主机一个历史在线源、一个历史失效源，失效源在源文件中紧随同主机的在线源
+    layout = [(1, 'a_good'), (1, 'a_dead'), (2, 'b_good'), (2, 'b_dead'), (3, 'c_good'), (3, 'c_dead')]
+
+    def build(port):
+        history = HistoryIndex()
+        channels = []
+        for host, name in layout:
+            url = f"http://127.0.0.{host}:{port}/{name}.ts"
+            for _ in range(3):
+                history.record(url, name.endswith('good'))
+            channels.append(Channel(name, url))
+        return make_tester(history, enable_history_ordering='true'), channels
+
+    _, arrivals = run_scenario(build, offline={'a_dead', 'b_dead', 'c_dead'})
+    # 并发为2：前两个名额给排序最靠前的两个源，失效源不会随同主机的在线源一起提前测速
+    # （之后的请求顺序还受建立新连接快慢影响，只比较相对先后）
+    assert arrivals[:2] == ['a_good', 'b_good']
+    assert arrivals.index('c_good') < min(arrivals.index('b_dead'), arrivals.index('c_dead'))
+
+
+def test_rank_order_survives_ip_grouping():
+    # 三个频道各有两个候选，同一频道的两个候选在同一主机
+    layout = [(1, 'x', 0), (1, 'x', 1), (2, 'y', 0), (2, 'y', 1), (3, 'z', 0), (3, 'z', 1)]
+
+    def build(port):
+        channels = [
+            Channel(name, f"http://127.0.0.{host}:{port}/{name}{rank}.ts", category='测试')
+            for host, name, rank in layout
+        ]
+        return make_tester(enough_online_per_channel='1'), channels
+
+    channels, arrivals = run_scenario(build)
+    # 第1候选全部先测；x、y 的第1候选在线后，其第2候选取得名额时直接跳过
+    assert arrivals[:3] == ['x0', 'y0', 'z0']
+    assert [c.status for c in channels[:4]] == ['online', 'skipped', 'online', 'skipped']
+    assert channels[4].status == 'online'
+
+
+def test_reused_results_are_not_written_to_history(tmp_path):
+    from core import ResultExporter
+
+    options = {
+        'enable_result_store': 'true',
+        'result_store_path': str(tmp_path / 'probe_results.sqlite'),
+    }
+
+    def build(port):
+        # 每次启动桩服务端口不同，结果存储按去重键查找，固定去重键
+        channels = [
+            Channel(name, f"http://127.0.0.1:{port}/{name}.ts", url_key=f"stub/{name}")
+            for name in ('fresh', 'again')
+        ]
+        return make_tester(**options), channels
+
+    first, arrivals = run_scenario(build)
+    assert arrivals == ['fresh', 'again'] and not any(c.reused for c in first)
+    second, arrivals = run_scenario(build)
+    assert arrivals == [] and all(c.reused and c.status == 'online' for c in second)
+
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'PATHS': {'csv_output_path': str(tmp_path / 'history'),
+                  'uncategorized_channels_path': str(tmp_path / 'uncategorized.txt'),
+                  'failed_urls_path': str(tmp_path / 'failed_urls.txt')},
+        'EXPORTER': {'compress_history': 'false'},
+    })
+    exporter = ResultExporter(str(tmp_path), '', config, matcher=None)
+    # 同一批URL：实际测速一次、复用一次，历史中只记录实际测速的结果
+    exporter._export_history(first + second)
+    index = HistoryIndex.from_directory(str(tmp_path / 'history'))
+    assert [index.urls[c.url].tests for c in first] == [1, 1]
+    assert not any(c.url in index.urls for c in second)
+
+
+def test_dead_source_timeout_requires_history_ordering():
+    url = 'http://dead.example/live.m3u8'
+    history = HistoryIndex()
+    for _ in range(3):
+        history.record(url, False)
+
+    plain = make_tester(history, http_timeout='5', dead_source_timeout='2')
+    assert plain._timeout_for(url, is_udp=False) == 5
+    ordered = make_tester(history, http_timeout='5', dead_source_timeout='2', enable_history_ordering='true')
+    assert ordered._timeout_for(url, is_udp=False) == 2
+
+
+def test_history_loaded_only_when_used(tmp_path):
+    from main import load_history
+
+    history_dir = tmp_path / 'history'
+    history_dir.mkdir()
+    (history_dir / 'history_20250101_000000.csv').write_text(
+        'Name,URL,Category,OriginalCategory,Status,Speed(KB/s),Response(ms)\n'
+        'CCTV1,http://a.example/1.m3u8,央视,央视,offline,0,0\n',
+        encoding='utf-8'
+    )
+    config = configparser.ConfigParser()
+    config.read_dict({'PATHS': {'csv_output_path': str(history_dir)}})
+    assert not load_history(config)
+
+    config.read_dict({'TESTER': {'enable_history_ordering': 'true'}})
+    assert not load_history(config)  # 未开启 [EXPORTER] enable_history
+
+    config.read_dict({'EXPORTER': {'enable_history': 'true'}})
+    assert len(load_history(config)) == 1
@@ -0,0 +1,152 @@
+"""原生UDP/RTP测速：解析 -> 测速 端到端（本机回环组播）"""
+import asyncio
+import socket
+import struct
+import configparser
+
+import pytest
+
+from core import PlaylistParser, SpeedTester
+from core.udp_probe import UdpProbe, is_ts_payload, rtp_payload
+
+TS_PACKET = bytes([0x47]) + b'\x00' * 187
+GROUP = '239.255.42.1'
+
+PLAYLIST = f"""#EXTM3U
+#EXTINF:-1 group-title="组播",TS组播
+udp://@{GROUP}:15500
+#EXTINF:-1 group-title="组播",RTP组播
+rtp://{GROUP.rsplit('.', 1)[0]}.2:15500
+#EXTINF:-1 group-title="组播",非TS
+udp://@{GROUP.rsplit('.', 1)[0]}.3:15501
+#EXTINF:-1 group-title="组播",无数据
+udp://@{GROUP.rsplit('.', 1)[0]}.4:15502
+"""
+
+
+def rtp_packet(seq: int, payload: bytes) -> bytes:
+    return struct.pack('!BBHII', 0x80, 33, seq & 0xFFFF, seq * 3600, 1234) + payload
+
+
+def test_rtp_payload_and_ts_check():
+    payload = TS_PACKET * 7
+    assert rtp_payload(payload) == payload
+    assert rtp_payload(rtp_packet(1, payload)) == payload
+    assert is_ts_payload(payload)
+    assert not is_ts_payload(b'junk' * 300)
+
+
+def test_parse_url():
+    assert UdpProbe.parse_url('udp://@239.1.1.1:5000') == ('239.1.1.1', 5000, None)
+    assert UdpProbe.parse_url('rtp://10.0.0.1@232.0.0.1:1234') == ('232.0.0.1', 1234, '10.0.0.1')
+    with pytest.raises(ValueError):
+        UdpProbe.parse_url('udp://239.1.1.1')
+
+
+@pytest.mark.parametrize('engine', ['fast', 'legacy'])
+@pytest.mark.parametrize('native', [True, False])
+def test_parser_keeps_native_urls_only_with_native_probe(engine, native):
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'PARSER': {'parser_engine': engine},
+        'TESTER': {'native_udp_probe': str(native).lower()},
+    })
+    parser = PlaylistParser(config)
+    m3u = [c.name for c in parser.parse(PLAYLIST)]
+    assert m3u == (['TS组播', 'RTP组播', '非TS', '无数据'] if native else [])
+
+    # 协议名不区分大小写；rtsp/rtmp 没有测速方式，始终忽略
+    txt = ("CCTV1,UDP://@239.1.1.1:5000\nCCTV2,rtp://232.0.0.1:1234\n"
+           "CCTV3,rtsp://h/live\nCCTV4,rtmp://h/live\nCCTV5,http://h/live.m3u8\n")
+    expected = ['UDP://@239.1.1.1:5000', 'rtp://232.0.0.1:1234'] if native else []
+    assert [c.url for c in parser.parse(txt)] == expected + ['http://h/live.m3u8']
+
+
+def _multicast_sender() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton('127.0.0.1'))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        sock.setblocking(False)
+    except OSError as e:
+        sock.close()
+        pytest.skip(f"本机不支持回环组播: {e}")
+    return sock
+
+
+async def _send(sock: socket.socket, stop: asyncio.Event) -> None:
+    prefix = GROUP.rsplit('.', 1)[0]
+    seq = 0
+    while not stop.is_set():
+        seq += 1
+        sock.sendto(TS_PACKET * 7, (GROUP, 15500))
+        sock.sendto(rtp_packet(seq, TS_PACKET * 7), (f'{prefix}.2', 15500))
+        sock.sendto(b'junk' * 300, (f'{prefix}.3', 15501))
+        await asyncio.sleep(0.002)
+
+
+def test_playlist_to_native_udp_probe():
+    config = configparser.ConfigParser()
+    config.read_dict({'TESTER': {
+        'native_udp_probe': 'true',
+        'udp_interface': '127.0.0.1',
+        'udp_sample_window': '0.5',
+        'udp_timeout': '1.0',
+        'max_udp_latency': '500',
+        'min_udp_download_speed': '30',
+    }})
+    channels = list(PlaylistParser(config).parse(PLAYLIST))
+    tester = SpeedTester(timeout=3, concurrency=10, max_attempts=1, min_download_speed=0.1,
+                         enable_logging=False, config=config)
+
+    async def run():
+        sock = _multicast_sender()
+        stop = asyncio.Event()
+        sender = asyncio.create_task(_send(sock, stop))
+        try:
+            await tester.test_channels(channels, lambda *args: None, set(), set())
+        except OSError as e:
+            pytest.skip(f"无法加入组播组: {e}")
+        finally:
+            stop.set()
+            await sender
+            sock.close()
+
+    asyncio.run(run())
+    status = {c.name: c.status for c in channels}
+    assert status == {'TS组播': 'online', 'RTP组播': 'online', '非TS': 'offline', '无数据': 'offline'}
+    assert tester.udp_results[channels[0].url].is_ts
+    assert not tester.udp_results[channels[2].url].is_ts
+    assert tester.udp_results[channels[3].url].packets == 0
+
+
+@pytest.mark.parametrize('url_host', ['127.0.0.1', '192.0.2.10', 'stream.example'])
+def test_unicast_probe_binds_local_port(url_host):
+    """单播地址中的主机是推流端（可能不是本机地址），探测绑定本地端口接收"""
+    probe = UdpProbe(sample_window=0.3)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    port_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    port_sock.bind(('127.0.0.1', 0))
+    port = port_sock.getsockname()[1]
+    port_sock.close()
+
+    async def send(stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            sender.sendto(TS_PACKET * 7, ('127.0.0.1', port))
+            await asyncio.sleep(0.002)
+
+    async def run():
+        stop = asyncio.Event()
+        task = asyncio.create_task(send(stop))
+        try:
+            return await probe.probe(f"udp://{url_host}:{port}", timeout=1.0)
+        finally:
+            stop.set()
+            await task
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        sender.close()
+    assert result.packets > 0 and result.is_ts